@@ -25,6 +25,7 @@ app = Flask(__name__)
 app.secret_key = b'your-fixed-secret-key-here'  # Ersetze dies durch einen starken Schlüssel
 
 CONFIG_FILE = 'config.json'
+STATUS_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slideshow.sock')
 try:
     with open(CONFIG_FILE, 'r') as f:
         config_data = json.load(f)
@@ -162,6 +163,23 @@ def load_config():
         logging.error(f"Fehler beim Laden der Konfigurationsdatei: {e}")
         sys.exit(1)
         
+def read_slideshow_status():
+    """Liest den aktuellen Anzeigestatus über den Unix-Socket der Slideshow."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(1.0)
+            sock.connect(STATUS_SOCKET)
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return json.loads(b''.join(chunks).decode('utf-8'))
+    except Exception as e:
+        logging.debug(f"Slideshow-Status nicht verfügbar: {e}")
+        return {}
+
 def get_current_interface_config(interface='eth0'):
     """Ermittelt aktuelle IP, Gateway und DNS für das angegebene Interface."""
     config = {'ip': '', 'gateway': '', 'dns': ''}
@@ -434,10 +452,16 @@ def config():
                 "reload": False,
                 "split_screen": split_screen_active,
                 "stretch_images": stretch_images_active,
+                "transition": request.form.get('transition', 'none').strip(),
+                "transition_duration": float(request.form.get('transition_duration', 0.8)),
                 # log_level aus bestehender Config übernehmen
                 "log_level": existing_cfg.get("log_level", "DEBUG")
             }
 
+            # Übrige Keys (z.B. lookahead_*) aus der bestehenden Config übernehmen
+            for key, value in existing_cfg.items():
+                new_config.setdefault(key, value)
+
             # Validierung wie gehabt...
 
             with open(CONFIG_FILE, 'w') as f:
@@ -446,7 +470,7 @@ def config():
             logging.info(f"Konfiguration aktualisiert: {new_config}")
             return redirect(url_for('config'))
         except ValueError:
-            flash('Bitte geben Sie gültige numerische Werte für Anzeigedauer und Rotation ein.', 'danger')
+            flash('Bitte geben Sie gültige numerische Werte für Anzeigedauer, Rotation und Übergangsdauer ein.', 'danger')
             return redirect(url_for('config'))
         except Exception as e:
             logging.error(f"Fehler beim Speichern der Konfiguration: {e}")
@@ -626,42 +650,26 @@ def network_config():
 @app.route('/current_image')
 @login_required
 def current_image():
+    status = read_slideshow_status()
+    panes = status.get("panes", {})
     data = {
-        "compat": "",
-        "fullscreen": "",
-        "left": "",
-        "right": ""
+        "compat": status.get("compat", ""),
+        "fullscreen": panes.get("fullscreen", {}).get("url", ""),
+        "left": panes.get("left", {}).get("url", ""),
+        "right": panes.get("right", {}).get("url", ""),
+        "split_screen": status.get("split_screen", False),
+        "panes": panes,
+        "sources": status.get("sources", {})
     }
-    try:
-        with open("current_image.txt", "r") as f:
-            data["compat"] = f.read().strip()
-    except:
-        data["compat"] = ""
-    
-    cfg = load_config()
-    is_split = cfg.get("split_screen", False)
-    
-    if is_split:
-        try:
-            with open("current_image_left.txt", "r") as f:
-                data["left"] = f.read().strip()
-        except:
-            data["left"] = ""
-        
-        try:
-            with open("current_image_right.txt", "r") as f:
-                data["right"] = f.read().strip()
-        except:
-            data["right"] = ""
-    else:
-        try:
-            with open("current_image_fullscreen.txt", "r") as f:
-                data["fullscreen"] = f.read().strip()
-        except:
-            data["fullscreen"] = ""
-    
     return jsonify(data)
     
+@app.route('/source_health')
+@login_required
+def source_health():
+    """Zustand der Bildquellen (letzter Erfolg, Fehlerzahl, nächster Versuch) aus dem Status-Socket."""
+    status = read_slideshow_status()
+    return jsonify({"sources": status.get("sources", {})})
+
 @app.route('/log_excerpt')
 @login_required
 def log_excerpt():
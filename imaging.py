@@ -0,0 +1,274 @@
+"""
+Bildverarbeitung ohne pygame und ohne Seiteneffekte beim Import: Suchen
+der Bilddateien, Dekodieren im Speicherbudget, Ausrichten und Skalieren auf
+eine Pane sowie das Erzeugen von Derivaten und Kachelpyramiden. Die
+Ingest-Prozesse und das Werkzeug slidepack.py verwenden nur dieses Modul.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from PIL import Image, ImageOps
+
+EXIF_ORIENTATION = 0x0112
+
+
+class DecodeBudgetError(Exception):
+    """Ein Bild lässt sich nicht innerhalb des Speicherbudgets dekodieren."""
+
+
+# Speicherbudget je Dekodierung; wird aus config.json (decode_max_mb) gesetzt
+decode_limits = {'max_bytes': 128 * 1024 * 1024}
+
+
+def decode_target(size, rotation):
+    """Benötigte Quellauflösung für eine Pane, vor einer 90°/270°-Rotation."""
+    if rotation % 180 == 90:
+        return (size[1], size[0])
+    return tuple(size)
+
+
+def open_oriented(image_file, target_size=None, max_bytes=None, fit_budget=False):
+    """
+    Öffnet ein Bild, richtet es nach seiner EXIF-Orientierung aus und
+    normalisiert den Modus auf RGB bzw. RGBA. Liefert (Bild, Orientierung).
+
+    Mit target_size werden JPEGs per DCT-Skalierung (draft) direkt in
+    annähernd dieser Größe dekodiert. Überschreitet die zu dekodierende
+    Auflösung max_bytes, wird DecodeBudgetError ausgelöst, statt den
+    Speicher zu sprengen. Mit fit_budget wird das Bild stattdessen in der
+    größten Halbierungsstufe geliefert, die ins Budget passt: JPEGs direkt
+    per draft, andere Formate lassen sich nur voll dekodieren und werden
+    danach reduziert.
+    """
+    if max_bytes is None:
+        max_bytes = decode_limits['max_bytes']
+    with Image.open(image_file) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        if target_size and img.format == 'JPEG':
+            tw, th = target_size
+            if orientation in (5, 6, 7, 8):
+                tw, th = th, tw
+            img.draft(img.mode, (tw, th))
+        width, height = img.size
+        bands = max(len(img.getbands()), 3)
+        factor = budget_factor(width, height, bands, max_bytes)
+        if factor > 1 and not fit_budget:
+            raise DecodeBudgetError(
+                f"{image_file}: {width}x{height} benötigt {width * height * bands // (1024 * 1024)} MB "
+                f"(Budget {max_bytes // (1024 * 1024)} MB)"
+            )
+        if factor > 1 and img.format == 'JPEG' and not target_size:
+            img.draft(img.mode, (-(-width // factor), -(-height // factor)))
+            factor = budget_factor(*img.size, bands, max_bytes)
+        if orientation != 1:
+            img = ImageOps.exif_transpose(img)
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            img = img.convert('RGBA')
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        else:
+            img.load()
+    if factor > 1:
+        img = img.reduce(factor)
+    return img, orientation
+
+
+def budget_factor(width, height, bands, max_bytes):
+    """Kleinster Halbierungsfaktor (1, 2, 4, …), mit dem ein Bild in max_bytes passt."""
+    factor = 1
+    while (max_bytes and factor < max(width, height)
+           and -(-width // factor) * -(-height // factor) * bands > max_bytes):
+        factor *= 2
+    return factor
+
+
+def scale_to_pane(img, size, rotation, stretch_images):
+    """Rotiert und skaliert ein PIL-Bild und setzt es mittig in eine Pane der Größe size."""
+    if rotation:
+        img = img.rotate(rotation, expand=True)
+    pane_w, pane_h = size
+    w_img, h_img = img.size
+    if stretch_images:
+        nw, nh = pane_w, pane_h
+    else:
+        scale = min(pane_w / w_img, pane_h / h_img)
+        nw, nh = int(w_img * scale), int(h_img * scale)
+    if (nw, nh) != (w_img, h_img):
+        img = img.resize((nw, nh), Image.BILINEAR, reducing_gap=3.0)
+    frame = Image.new('RGB', size, (0, 0, 0))
+    offset = ((pane_w - nw) // 2, (pane_h - nh) // 2)
+    frame.paste(img, offset, img if img.mode == 'RGBA' else None)
+    return frame
+
+
+def scan_local_images(local_path, recursive=False):
+    """
+    Listet die Bilder unter local_path per os.scandir, auf Wunsch rekursiv
+    (versteckte Verzeichnisse ausgenommen). Liefert {relativer Pfad:
+    (Größe, mtime)}; ein nicht lesbares Startverzeichnis löst OSError aus.
+    """
+    supported_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+    found = {}
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            with os.scandir(os.path.join(local_path, rel_dir)) as entries:
+                for entry in entries:
+                    rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    if entry.is_dir():
+                        if recursive and not entry.name.startswith('.'):
+                            pending.append(rel)
+                    elif entry.name.lower().endswith(supported_extensions) and entry.is_file():
+                        st = entry.stat()
+                        found[rel] = (st.st_size, st.st_mtime)
+        except OSError:
+            if not rel_dir:
+                raise
+            logging.exception(f"Fehler beim Lesen des Unterverzeichnisses {rel_dir}")
+    return found
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_image(path):
+    """Abmessungen, EXIF-Orientierung, Aufnahmedatum und SHA1 einer Bilddatei, ohne sie zu dekodieren."""
+    with Image.open(path) as img:
+        exif = img.getexif()
+        width, height = img.size
+    orientation = exif.get(EXIF_ORIENTATION, 1)
+    # DateTimeOriginal liegt im Exif-IFD, DateTime im Haupt-IFD
+    taken = exif.get_ifd(0x8769).get(0x9003) or exif.get(0x0132)
+    return width, height, orientation, taken, file_sha1(path)
+
+
+def derivative_name(content_hash, size, rotation, stretch_images, orientation):
+    key = f"{content_hash}|{size[0]}x{size[1]}|{rotation}|{int(bool(stretch_images))}|{orientation}"
+    return f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:24]}.jpg"
+
+
+TILE_SIZE = 512
+
+
+def pyramid_dir(derivative_dir, content_hash):
+    return os.path.join(derivative_dir, 'tiles', content_hash)
+
+
+def build_pyramid(image_file, target, max_bytes):
+    """
+    Zerlegt ein Bild ausgerichtet in eine Kachelpyramide unter target:
+    Stufe 0 in voller Auflösung, jede weitere halb so groß, bis das Bild in
+    eine Kachel passt. Das Bild wird hier selbst geöffnet, damit jede Stufe
+    die vorige ersetzt und die volle Auflösung nur für Stufe 0 im Speicher
+    liegt. Sprengt die volle Auflösung max_bytes, beginnt die Pyramide mit
+    der größten Halbierungsstufe, die hineinpasst. Geschrieben wird in ein
+    temporäres Verzeichnis, das erst vollständig umbenannt wird.
+    """
+    img, _ = open_oriented(image_file, None, max_bytes, fit_budget=True)
+    if img.mode != 'RGB':
+        background = Image.new('RGB', img.size, (0, 0, 0))
+        background.paste(img, (0, 0), img if img.mode == 'RGBA' else None)
+        img = background
+    tmp_dir = f"{target}.{os.getpid()}.tmp"
+    levels = []
+    while True:
+        width, height = img.size
+        level_dir = os.path.join(tmp_dir, str(len(levels)))
+        os.makedirs(level_dir, exist_ok=True)
+        for top in range(0, height, TILE_SIZE):
+            for left in range(0, width, TILE_SIZE):
+                tile = img.crop((left, top, min(width, left + TILE_SIZE), min(height, top + TILE_SIZE)))
+                tile.save(os.path.join(level_dir, f"{left // TILE_SIZE}_{top // TILE_SIZE}.jpg"), 'JPEG', quality=90)
+        levels.append([width, height])
+        if max(width, height) <= TILE_SIZE:
+            break
+        img = img.reduce(2)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump({'tile': TILE_SIZE, 'levels': levels}, f)
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        # Ein anderer Ingest-Prozess war schneller
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def open_pyramid(directory, target_size):
+    """
+    Setzt die kleinste Stufe einer Kachelpyramide, die target_size noch
+    abdeckt, zu einem RGB-Bild zusammen. Die Pyramide ist bereits
+    ausgerichtet.
+    """
+    with open(os.path.join(directory, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    tile = meta['tile']
+    level = 0
+    for index, (width, height) in enumerate(meta['levels']):
+        if width < target_size[0] or height < target_size[1]:
+            break
+        level = index
+    width, height = meta['levels'][level]
+    img = Image.new('RGB', (width, height), (0, 0, 0))
+    for top in range(0, height, tile):
+        for left in range(0, width, tile):
+            with Image.open(os.path.join(directory, str(level), f"{left // tile}_{top // tile}.jpg")) as part:
+                img.paste(part, (left, top))
+    return img
+
+
+def build_derivative(image_file, meta, size, rotation, stretch_images, derivative_dir, max_bytes):
+    """
+    Läuft in einem Ingest-Prozess: erzeugt das Derivat eines Bildes für die
+    gegebene Pane-Konfiguration (falls noch nicht vorhanden).
+
+    meta sind die Metadaten aus dem Bildindex (hash, orientation, width,
+    height). Hat der Index die Datei noch nicht untersucht, geschieht das
+    hier einmalig; das Ergebnis wird als 'probe' für den Index zurückgegeben.
+    'outputs' enthält das Derivat. Ein Bild, das sich nicht im Budget
+    dekodieren lässt (etwa ein PNG-Poster), wird aus seiner Kachelpyramide
+    erzeugt, sobald diese vorliegt.
+    """
+    probe = None
+    if meta is None:
+        size_bytes = os.path.getsize(image_file)
+        width, height, orientation, taken, content_hash = probe_image(image_file)
+        probe = meta = {
+            'size': size_bytes, 'width': width, 'height': height,
+            'orientation': orientation, 'taken': taken, 'hash': content_hash,
+        }
+    target = os.path.join(
+        derivative_dir, derivative_name(meta['hash'], size, rotation, stretch_images, meta['orientation'])
+    )
+    if not os.path.isfile(target):
+        try:
+            img, _ = open_oriented(image_file, decode_target(size, rotation), max_bytes)
+        except DecodeBudgetError:
+            directory = pyramid_dir(derivative_dir, meta['hash'])
+            if not os.path.isfile(os.path.join(directory, 'meta.json')):
+                raise
+            img = open_pyramid(directory, decode_target(size, rotation))
+        frame = scale_to_pane(img, size, rotation, stretch_images)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        frame.save(tmp_path, 'JPEG', quality=90)
+        os.replace(tmp_path, target)
+    return {'path': image_file, 'probe': probe, 'outputs': [target]}
+
+
+def build_poster(image_file, content_hash, derivative_dir, max_bytes):
+    """
+    Läuft im Poster-Prozess: erzeugt die Kachelpyramide eines sehr großen
+    Bildes (falls noch nicht vorhanden). Da es dafür vollständig dekodiert
+    werden muss, gibt es nur einen solchen Prozess.
+    """
+    target = pyramid_dir(derivative_dir, content_hash)
+    if not os.path.isfile(os.path.join(target, 'meta.json')):
+        build_pyramid(image_file, target, max_bytes)
+    return {'path': image_file, 'probe': None, 'outputs': [target]}
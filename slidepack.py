@@ -0,0 +1,310 @@
+"""
+Slide-Packs: vorab kompilierte Playlists für feste Inhalte (Menütafeln,
+Lobby-Schleifen).
+
+Ein Pack enthält alle Bilder bereits rotiert und auf eine Pane-Größe
+skaliert als Rohpixel im Display-Format. Die Slideshow blendet es per mmap
+ein und blittet die Frames direkt aus dem gemappten Puffer – ohne
+Dekodieren und ohne die Bilder in den Prozessspeicher zu kopieren.
+
+Aufbau der Datei:
+    24 Byte Kopf: Magic b'SLPK', Version (uint16), reserviert (uint16),
+                  Offset und Länge des Index (je uint64, little-endian)
+    Frames:       je Breite * Höhe * 4 Byte, auf 4096 Byte ausgerichtet
+    Index (JSON): width, height, format, rotation, stretch_images, created
+                  und frames [{name, offset, crc32}, ...]
+
+Kommandozeile:
+    python slidepack.py build -o menu.pack --size 1920x1080 bilder/
+    python slidepack.py verify menu.pack
+    python slidepack.py info menu.pack
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import pygame
+
+from imaging import decode_target, open_oriented, scale_to_pane, scan_local_images
+
+MAGIC = b'SLPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+ALIGN = 4096
+PACK_SUFFIX = '.pack'
+# Byte-Reihenfolge der Pixel; BGRA entspricht dem üblichen XRGB8888-Framebuffer,
+# pygame.image.frombuffer() kennt es aber erst ab pygame 2.1.3
+FORMATS = ('RGBX', 'BGRA')
+
+
+class SlidePackError(Exception):
+    """Die Datei ist kein gültiges Slide-Pack."""
+
+
+def frame_key(path, index):
+    """Playlist-Eintrag für Frame `index` eines Packs; sortiert nach Name in Pack-Reihenfolge."""
+    return f"{path}#{index:05d}"
+
+
+def parse_frame_key(value):
+    """(Pfad, Index) eines Pack-Eintrags, sonst None."""
+    path, sep, index = value.rpartition('#')
+    if sep and path.lower().endswith(PACK_SUFFIX) and index.isdigit():
+        return path, int(index)
+    return None
+
+
+def align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+class SlidePack:
+    """Ein per mmap eingeblendetes Slide-Pack (nur lesend)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SlidePackError(f"{path}: leere Datei") from e
+        try:
+            self._read_index()
+        except Exception:
+            self._map.close()
+            raise
+
+    def _read_index(self):
+        if len(self._map) < HEADER.size:
+            raise SlidePackError(f"{self.path}: Datei zu kurz")
+        magic, version, _, index_offset, index_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SlidePackError(f"{self.path}: kein Slide-Pack")
+        if version != VERSION:
+            raise SlidePackError(f"{self.path}: Version {version} wird nicht unterstützt")
+        if index_offset + index_length > len(self._map):
+            raise SlidePackError(f"{self.path}: Index außerhalb der Datei")
+        try:
+            index = json.loads(self._map[index_offset:index_offset + index_length].decode('utf-8'))
+        except ValueError as e:
+            raise SlidePackError(f"{self.path}: Index nicht lesbar") from e
+        if index.get('format') not in FORMATS:
+            raise SlidePackError(f"{self.path}: unbekanntes Pixelformat {index.get('format')}")
+        self.size = (int(index['width']), int(index['height']))
+        self.format = index['format']
+        self.rotation = index.get('rotation', 0)
+        self.stretch_images = index.get('stretch_images', True)
+        self.frames = index['frames']
+        self.frame_bytes = self.size[0] * self.size[1] * 4
+        self.index_offset = index_offset
+
+    def __len__(self):
+        return len(self.frames)
+
+    def check_format(self):
+        """Stellt sicher, dass die installierte pygame-Version das Pixelformat einblenden kann."""
+        try:
+            pygame.image.frombuffer(bytes(4), (1, 1), self.format)
+        except (ValueError, pygame.error) as e:
+            raise SlidePackError(
+                f"{self.path}: Pixelformat {self.format} wird von pygame {pygame.version.ver} nicht "
+                f"unterstützt (BGRA erst ab 2.1.3); Pack mit --format RGBX neu erstellen"
+            ) from e
+
+    def surface(self, index):
+        """
+        Frame `index` als Surface, die direkt auf den gemappten Puffer zeigt.
+        Der Alphakanal wird abgeschaltet, damit SDL ohne Blending kopiert.
+        """
+        offset = self.frames[index]['offset']
+        frame = pygame.image.frombuffer(
+            memoryview(self._map)[offset:offset + self.frame_bytes], self.size, self.format
+        )
+        frame.set_alpha(None)
+        return frame
+
+    def verify(self):
+        """Prüft Lage und CRC32 aller Frames; liefert eine Liste der Fehler."""
+        problems = []
+        end = HEADER.size
+        for n, frame in enumerate(self.frames):
+            offset = frame.get('offset', -1)
+            if offset % ALIGN or offset < end or offset + self.frame_bytes > self.index_offset:
+                problems.append(f"Frame {n} ({frame.get('name')}): ungültiger Offset {offset}")
+                continue
+            end = offset + self.frame_bytes
+            if zlib.crc32(memoryview(self._map)[offset:end]) != frame.get('crc32'):
+                problems.append(f"Frame {n} ({frame.get('name')}): Prüfsumme stimmt nicht")
+        return problems
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # Es werden noch Surfaces des Packs angezeigt; das Mapping endet mit ihnen
+            pass
+
+
+class SlidePackCache:
+    """
+    Offene Packs je Pfad. Wird die Datei ersetzt (neue Änderungszeit), wird
+    sie neu eingeblendet; ein noch angezeigtes altes Mapping bleibt gültig,
+    da os.replace() den alten Inhalt nicht überschreibt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._packs = {}
+
+    def open(self, path):
+        with self._lock:
+            pack = self._packs.get(path)
+            if pack is not None and pack.mtime == os.path.getmtime(path):
+                return pack
+            new_pack = SlidePack(path)
+            try:
+                new_pack.check_format()
+            except SlidePackError:
+                new_pack.close()
+                raise
+            if pack is not None:
+                pack.close()
+            self._packs[path] = new_pack
+            logging.info(f"Slide-Pack {path}: {len(new_pack)} Frames, {new_pack.size[0]}x{new_pack.size[1]}")
+            return new_pack
+
+    def close(self):
+        with self._lock:
+            for pack in self._packs.values():
+                pack.close()
+            self._packs.clear()
+
+
+def frame_bytes(img, pixel_format):
+    """Rohpixel eines fertig skalierten RGB-Bildes im Pack-Format."""
+    if pixel_format == 'BGRA':
+        return img.convert('RGBA').tobytes('raw', 'BGRA')
+    return img.tobytes('raw', 'RGBX')
+
+
+def build_pack(output, images, size, rotation=0, stretch_images=True, pixel_format='RGBX'):
+    """
+    Dekodiert, rotiert und skaliert `images` genau wie die Slideshow und
+    schreibt sie als Pack nach `output`. Geschrieben wird in eine temporäre
+    Datei, die erst am Ende atomar umbenannt wird. Liefert die Zahl der Frames.
+    """
+    temp = f"{output}.part"
+    frames = []
+    with open(temp, 'wb') as out:
+        out.write(b'\0' * HEADER.size)
+        for image_file in images:
+            try:
+                img, _ = open_oriented(image_file, decode_target(size, rotation))
+                data = frame_bytes(scale_to_pane(img, size, rotation, stretch_images), pixel_format)
+            except Exception as e:
+                logging.error(f"Überspringe {image_file}: {e}")
+                continue
+            offset = align(out.tell())
+            out.seek(offset)
+            out.write(data)
+            frames.append({'name': os.path.basename(image_file), 'offset': offset, 'crc32': zlib.crc32(data)})
+        index = json.dumps({
+            'width': size[0],
+            'height': size[1],
+            'format': pixel_format,
+            'rotation': rotation,
+            'stretch_images': stretch_images,
+            'created': time.time(),
+            'frames': frames,
+        }).encode('utf-8')
+        index_offset = out.tell()
+        out.write(index)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, 0, index_offset, len(index)))
+    os.replace(temp, output)
+    return len(frames)
+
+
+def collect_images(paths, recursive):
+    """Bilddateien aus Dateien und Verzeichnissen, Verzeichnisinhalte nach Name sortiert."""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(os.path.join(path, rel) for rel in sorted(scan_local_images(path, recursive)))
+        else:
+            images.append(path)
+    return images
+
+
+def parse_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Größe muss BREITExHÖHE sein, nicht {value}")
+    return width, height
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Slide-Packs erstellen und prüfen.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="Bilder zu einem Pack kompilieren")
+    build.add_argument('images', nargs='+', help="Bilddateien oder Verzeichnisse")
+    build.add_argument('-o', '--output', required=True, help="Zieldatei (.pack)")
+    build.add_argument('--size', type=parse_size, required=True, help="Pane-Größe, z.B. 1920x1080")
+    build.add_argument('--rotation', type=int, default=0, help="Rotation in Grad")
+    build.add_argument('--fit', action='store_true', help="Seitenverhältnis erhalten statt strecken")
+    build.add_argument(
+        '--format', choices=FORMATS, default='RGBX', help="Pixelformat (Standard RGBX; BGRA erst ab pygame 2.1.3)"
+    )
+    build.add_argument('--recursive', action='store_true', help="Unterverzeichnisse einbeziehen")
+
+    for name, text in (('verify', "Frames eines Packs prüfen"), ('info', "Kopfdaten eines Packs anzeigen")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument('pack')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        images = collect_images(args.images, args.recursive)
+        if not images:
+            print("Keine Bilder gefunden.", file=sys.stderr)
+            return 1
+        count = build_pack(args.output, images, args.size, args.rotation, not args.fit, args.format)
+        print(f"{args.output}: {count} von {len(images)} Bildern, {os.path.getsize(args.output) / 1e6:.1f} MB")
+        return 0 if count else 1
+
+    try:
+        pack = SlidePack(args.pack)
+    except (OSError, SlidePackError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    try:
+        if args.command == 'info':
+            print(
+                f"{args.pack}: {len(pack)} Frames, {pack.size[0]}x{pack.size[1]}, {pack.format}, "
+                f"Rotation {pack.rotation}, {'gestreckt' if pack.stretch_images else 'eingepasst'}"
+            )
+            for n, frame in enumerate(pack.frames):
+                print(f"  {n:5d} {frame['name']}")
+            return 0
+        problems = pack.verify()
+        for problem in problems:
+            print(problem, file=sys.stderr)
+        print(f"{args.pack}: {len(pack)} Frames, {'OK' if not problems else f'{len(problems)} Fehler'}")
+        return 1 if problems else 0
+    finally:
+        pack.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    sys.exit(main())
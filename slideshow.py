@@ -2,66 +2,264 @@ import pygame
 import os
 import time
 import json
+import hashlib
+import math
 import sys
 import re
+import io
 import socket
 import platform
 import netifaces
 import logging
 from logging.handlers import RotatingFileHandler
+import threading
+import queue
+import multiprocessing
+import sqlite3
+import random
+import fnmatch
+import fcntl
+import shutil
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from smb.SMBConnection import SMBConnection
+from smb.base import NotConnectedError, NotReadyError, ProtocolError, SMBTimeout
 from contextlib import contextmanager
-from PIL import Image   # für Bildrotation
+from PIL import Image, ImageSequence   # Dekodierung, Animation
+import slidepack   # vorab kompilierte Slide-Packs (mmap, ohne Dekodieren)
+from imaging import (
+    DecodeBudgetError, build_derivative, build_poster, decode_limits, decode_target, derivative_name,
+    file_sha1, open_oriented, open_pyramid, probe_image, pyramid_dir, scale_to_pane, scan_local_images,
+)
 
 CONFIG_FILE = 'config.json'
-CURRENT_IMAGE_FULLSCREEN = "current_image_fullscreen.txt"
-CURRENT_IMAGE_LEFT = "current_image_left.txt"
-CURRENT_IMAGE_RIGHT = "current_image_right.txt"
+STATUS_SOCKET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'slideshow.sock')
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'cache')
+DERIVATIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'derivatives')
+IMAGE_INDEX_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'image_index.db')
+INDEX_RESYNC_DELAY = 10   # Sekunden nach dem Start, bis aus dem Index geladene Quellen abgeglichen werden
+SOURCES_UPDATED = pygame.USEREVENT + 1   # weckt den Render-Loop, wenn ein Quellen-Abgleich fertig ist
 
-# --- Logging Setup ---
-log_handler = RotatingFileHandler('slideshow.log', maxBytes=1048576, backupCount=3)
-formatter = logging.Formatter('%(asctime)s %(levelname)s [%(name)s]: %(message)s')
-log_handler.setFormatter(formatter)
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)  # Default-Level, wird später nach config überschrieben
-root_logger.addHandler(log_handler)
+_log_handler = None
+
+
+def setup_logging():
+    """
+    Hängt das rotierende slideshow.log an den Root-Logger. Erst beim Start
+    aufgerufen, nicht beim Import: die Ingest-Prozesse importieren dieses
+    Modul erneut und dürfen nicht in dieselbe Logdatei rotieren.
+    """
+    global _log_handler
+    if _log_handler is not None:
+        return
+    _log_handler = RotatingFileHandler('slideshow.log', maxBytes=1048576, backupCount=3)
+    _log_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s]: %(message)s'))
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)  # Default-Level, wird später nach config überschrieben
+    root_logger.addHandler(_log_handler)
+    logging.getLogger('PIL').setLevel(logging.INFO)  # PIL-Chunk-Debugausgaben unterdrücken
 
 
 def to_relative_cache_path(absolute_path):
+    absolute_path = os.path.abspath(absolute_path)
+    if absolute_path.startswith(CACHE_DIR + os.sep):
+        rel = os.path.relpath(absolute_path, CACHE_DIR).replace(os.sep, '/')
+        return f"/static/cache/{rel}"
     filename = os.path.basename(absolute_path)
     return f"/static/cache/{filename}"
 
 
-@contextmanager
-def smb_connection(username, password, domain, client_machine_name, server_name, server_ip):
+SMB_PORTS = (445, 139)
+SMB_CONNECT_TIMEOUT = 10
+# Fehler, nach denen eine Sitzung nicht weiterverwendet werden kann
+SMB_CONNECTION_ERRORS = (NotConnectedError, NotReadyError, ProtocolError, SMBTimeout, ConnectionError, socket.timeout)
+SMB_RESUME_CHECK = 64 * 1024   # vor dem Fortsetzen erneut gelesener und verglichener Bereich
+
+
+def backoff_delay(failures, base, maximum):
+    """Exponentielles Backoff mit Jitter (50-100 %), damit Geräte nicht im Gleichtakt neu verbinden."""
+    delay = min(maximum, base * 2 ** max(0, failures - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class SMBSessionPool:
     """
-    domain: z.B. 'MEINE-DOMÄNE' oder '' für Workgroup
+    Langlebige SMB-Sitzungen, gemeinsam genutzt von allen Panes.
+
+    Sitzungen sind nach (Server, Benutzer, Domain, Slot) geschlüsselt und
+    werden per Keepalive (echo) offen gehalten und nach Fehlern mit
+    exponentiellem Backoff neu aufgebaut. Slot 0 ist die gemeinsame Sitzung
+    für Listings; weitere Slots dienen parallelen Downloads. Der
+    funktionierende Port wird je Server gemerkt.
     """
-    conn = SMBConnection(
-        username,
-        password,
-        client_machine_name,
-        server_name,
-        domain=domain,
-        use_ntlm_v2=True
-    )
-    try:
-        if not (conn.connect(server_ip, 445) or conn.connect(server_ip, 139)):
-            logging.error(f"Verbindung zu SMB-Server {server_ip} fehlgeschlagen.")
-            yield None
-        else:
-            logging.info(f"SMB-Verbindung zu \\\\{server_name}\\ (Domain={domain}) hergestellt.")
-            yield conn
-    except Exception:
-        logging.exception("Fehler beim Herstellen der Verbindung zu SMB-Server")
-        yield None
-    finally:
+
+    def __init__(self, keepalive_interval=60, idle_timeout=900, max_backoff=300):
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._ports = {}
+        self._keepalive_thread = None
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = {
+                    'lock': threading.Lock(),
+                    'conn': None,
+                    'password': None,
+                    'last_used': 0.0,
+                    'failures': 0,
+                    'retry_at': 0.0,
+                }
+                self._sessions[key] = entry
+            return entry
+
+    @staticmethod
+    def _close(entry):
+        conn, entry['conn'] = entry['conn'], None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                logging.exception("Fehler beim Schließen der SMB-Verbindung")
+
+    def _connect(self, entry, username, password, domain, client_machine_name, server_name, server_ip):
+        # Zuletzt erfolgreichen Port zuerst probieren, erst dann die übrigen
+        ports = list(SMB_PORTS)
+        known_port = self._ports.get(server_ip)
+        if known_port in ports:
+            ports.remove(known_port)
+            ports.insert(0, known_port)
+        for port in ports:
+            conn = SMBConnection(
+                username,
+                password,
+                client_machine_name,
+                server_name,
+                domain=domain,
+                use_ntlm_v2=True,
+                is_direct_tcp=(port == 445)
+            )
+            try:
+                if conn.connect(server_ip, port, timeout=SMB_CONNECT_TIMEOUT):
+                    self._ports[server_ip] = port
+                    return conn
+            except Exception:
+                logging.debug(f"SMB-Verbindung zu {server_ip}:{port} fehlgeschlagen", exc_info=True)
+            try:
+                conn.close()
+            except Exception:
+                pass
+        return None
+
+    def _alive(self, entry):
+        if time.time() - entry['last_used'] < self.keepalive_interval:
+            return True
         try:
-            conn.close()
+            entry['conn'].echo(b'keepalive', timeout=SMB_CONNECT_TIMEOUT)
+            return True
         except Exception:
-            logging.exception("Fehler beim Schließen der SMB-Verbindung")
-        else:
-            logging.info(f"SMB-Verbindung zu {server_ip} geschlossen.")
+            logging.info("SMB-Sitzung nicht mehr erreichbar – baue neu auf.")
+            return False
+
+    @contextmanager
+    def session(self, username, password, domain, client_machine_name, server_name, server_ip, slot=0):
+        """
+        Leiht die Sitzung für (server_ip, username, domain, slot) exklusiv aus.
+        Liefert None, wenn keine Verbindung besteht oder der Backoff läuft.
+        Fehler im with-Block verwerfen die Sitzung und werden weitergereicht.
+        """
+        key = (server_ip, username, domain, slot)
+        entry = self._entry(key)
+        with entry['lock']:
+            if entry['conn'] is not None and (entry['password'] != password or not self._alive(entry)):
+                self._close(entry)
+            if entry['conn'] is None:
+                now = time.time()
+                if now < entry['retry_at']:
+                    logging.debug(
+                        f"SMB-Reconnect zu {server_ip} im Backoff "
+                        f"(noch {entry['retry_at'] - now:.0f} s)"
+                    )
+                    yield None
+                    return
+                conn = self._connect(entry, username, password, domain,
+                                     client_machine_name, server_name, server_ip)
+                if conn is None:
+                    entry['failures'] += 1
+                    delay = backoff_delay(entry['failures'], 5, self.max_backoff)
+                    entry['retry_at'] = now + delay
+                    logging.error(
+                        f"Verbindung zu SMB-Server {server_ip} fehlgeschlagen "
+                        f"(Versuch {entry['failures']}, nächster in {delay:.0f} s)."
+                    )
+                    yield None
+                    return
+                entry.update(conn=conn, password=password, failures=0, retry_at=0.0)
+                logging.info(
+                    f"SMB-Verbindung zu \\\\{server_name}\\ (Domain={domain}, "
+                    f"Port={self._ports.get(server_ip)}, Slot={slot}) hergestellt."
+                )
+            try:
+                yield entry['conn']
+            except Exception:
+                self._close(entry)
+                raise
+            finally:
+                entry['last_used'] = time.time()
+
+    def start_keepalive(self):
+        if self._keepalive_thread is None:
+            self._keepalive_thread = threading.Thread(
+                target=self._keepalive_loop, name="smb-keepalive", daemon=True
+            )
+            self._keepalive_thread.start()
+
+    def _keepalive_loop(self):
+        while True:
+            time.sleep(self.keepalive_interval)
+            with self._lock:
+                entries = list(self._sessions.items())
+            for key, entry in entries:
+                # Belegte Sitzungen nicht stören
+                if not entry['lock'].acquire(blocking=False):
+                    continue
+                try:
+                    if entry['conn'] is None:
+                        continue
+                    if time.time() - entry['last_used'] > self.idle_timeout:
+                        logging.info(f"Schließe unbenutzte SMB-Sitzung zu {key[0]}")
+                        self._close(entry)
+                    elif not self._alive(entry):
+                        self._close(entry)
+                finally:
+                    entry['lock'].release()
+
+    def close_all(self):
+        with self._lock:
+            entries = list(self._sessions.values())
+        for entry in entries:
+            with entry['lock']:
+                self._close(entry)
+
+
+smb_pool = SMBSessionPool()
+
+
+@contextmanager
+def smb_connection(username, password, domain, client_machine_name, server_name, server_ip, slot=0):
+    """
+    domain: z.B. 'MEINE-DOMÄNE' oder '' für Workgroup
+
+    Leiht eine Sitzung aus dem gemeinsamen Pool aus; die Verbindung bleibt
+    nach dem with-Block für weitere Zugriffe offen.
+    """
+    with smb_pool.session(username, password, domain, client_machine_name, server_name, server_ip, slot) as conn:
+        yield conn
 
 
 def load_config():
@@ -86,6 +284,28 @@ def load_config():
         "smb_password_right": "",
         "reload": False,
         "stretch_images": True,
+        "transition": "none",
+        "transition_duration": 0.8,
+        "lookahead_count": 2,
+        "lookahead_max_mb": 64,
+        "smb_sync_interval": 300,
+        "recursive": False,
+        "order": "name",
+        "smb_concurrency": 3,
+        "smb_concurrency_left": 3,
+        "smb_concurrency_right": 3,
+        "cache_max_mb": 1024,
+        "ingest_workers": 0,
+        "derivative_max_mb": 1024,
+        "decode_max_mb": 128,
+        "frame_cache_mb": 48,
+        "smb_bandwidth_mbit": 0,
+        "smb_full_sync_windows": [],
+        "smb_sync_jitter": 30,
+        "poster_min_side": 0,
+        "poster_max_mb": 256,
+        "poster_zoom": 0.5,
+        "poster_fps": 10,
         "log_level": "DEBUG"
     }
     if os.path.exists(CONFIG_FILE):
@@ -101,7 +321,7 @@ def load_config():
             if missing:
                 save_config(default_config)
                 logging.info(f"Fehlende SMB-Domain-Keys hinzugefügt: {missing}")
-            logging.info("Konfigurationsdatei erfolgreich geladen.")
+            logging.debug("Konfigurationsdatei erfolgreich geladen.")
         except Exception:
             logging.exception("Fehler beim Laden der Konfigurationsdatei")
     else:
@@ -118,75 +338,888 @@ def save_config(config):
         logging.exception("Fehler beim Schreiben der Konfigurationsdatei")
 
 
-def get_local_image_files(local_path):
-    supported_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
-    image_files = []
-    if os.path.isdir(local_path):
-        try:
-            image_files = [
-                os.path.join(local_path, f)
-                for f in os.listdir(local_path)
-                if f.lower().endswith(supported_extensions)
+def get_local_image_files(local_path, recursive=False, cached=False):
+    """
+    Gleicht ein lokales Verzeichnis inkrementell mit dem Bildindex ab und
+    liefert die Bildpfade. Mit cached=True wird ein vorhandener Index ohne
+    erneutes Listing verwendet (Start, Config-Reload).
+    """
+    if not local_path:
+        return []
+    if not os.path.isdir(local_path):
+        # z.B. nicht eingehängter USB-Stick oder Netzlaufwerk
+        raise SourceUnavailable(f"Lokaler Pfad ist kein Verzeichnis: {local_path}")
+    if cached and image_index.scanned(local_path, recursive):
+        image_files = image_index.files(local_path)
+        logging.info(f"Lokale Bilder aus dem Index: {len(image_files)} in {local_path}")
+        return image_files
+    try:
+        found = scan_local_images(local_path, recursive)
+    except OSError as e:
+        logging.exception(f"Fehler beim Lesen des lokalen Pfads {local_path}")
+        raise SourceUnavailable(f"Fehler beim Lesen von {local_path}: {e}") from e
+    image_index.sync(local_path, recursive, {
+        rel: (size, mtime, os.path.join(local_path, rel)) for rel, (size, mtime) in found.items()
+    })
+    image_files = image_index.files(local_path)
+    logging.info(f"Gefundene lokale Bilder: {len(image_files)} in {local_path}")
+    return image_files
+
+
+class ImageIndex:
+    """
+    Persistenter Bildindex (SQLite) je Quelle (lokaler Pfad oder SMB-URL).
+
+    Gespeichert werden je Datei Größe, Änderungszeit und der lokale Pfad,
+    nachgelagert in einem Hintergrund-Thread auch Abmessungen,
+    EXIF-Orientierung, Aufnahmedatum und SHA1. Abgleiche sind inkrementell:
+    nur neue oder geänderte Dateien verlieren ihre Metadaten und werden neu
+    untersucht. Start und Reload lesen die Bildliste direkt aus dem Index.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._probe_thread = None
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " source TEXT PRIMARY KEY, recursive INTEGER, scanned_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS images ("
+                " source TEXT, path TEXT, size INTEGER, mtime REAL, local TEXT,"
+                " width INTEGER, height INTEGER, orientation INTEGER, taken TEXT, hash TEXT,"
+                " PRIMARY KEY (source, path))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS images_unprobed ON images (hash) WHERE hash IS NULL")
+            conn.execute("CREATE INDEX IF NOT EXISTS images_local ON images (local)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def scanned(self, source, recursive):
+        """True, wenn die Quelle mit derselben Rekursions-Einstellung schon einmal abgeglichen wurde."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT recursive FROM sources WHERE source = ?", (source,)
+            ).fetchone()
+        return row is not None and bool(row[0]) == bool(recursive)
+
+    def files(self, source):
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT local FROM images WHERE source = ? ORDER BY path", (source,)
+            ).fetchall()
+        return [local for (local,) in rows]
+
+    def entries(self, source):
+        """{Pfad: {size, mtime, local, hash}} einer Quelle."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT path, size, mtime, local, hash FROM images WHERE source = ?", (source,)
+            ).fetchall()
+        return {
+            path: {'size': size, 'mtime': mtime, 'local': local, 'hash': content_hash}
+            for path, size, mtime, local, content_hash in rows
+        }
+
+    def details(self, source):
+        """{lokaler Pfad: (mtime, Aufnahmedatum, Pfad in der Quelle)} einer Quelle, für die Sortierung der Playlist."""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT local, mtime, taken, path FROM images WHERE source = ?", (source,)
+            ).fetchall()
+        return {local: (mtime, taken, path) for local, mtime, taken, path in rows}
+
+    def sync(self, source, recursive, listing):
+        """
+        Übernimmt ein vollständiges Listing {Pfad: (Größe, mtime, lokal)}.
+        Unveränderte Einträge behalten ihre Metadaten; liefert
+        (neu, geändert, entfernt).
+        """
+        with self._lock:
+            db = self._db()
+            known = {
+                path: (size, mtime, local) for path, size, mtime, local in
+                db.execute("SELECT path, size, mtime, local FROM images WHERE source = ?", (source,))
+            }
+            removed = [(source, path) for path in known if path not in listing]
+            added = [(source, path, *entry) for path, entry in listing.items() if path not in known]
+            changed = [
+                (*entry, source, path) for path, entry in listing.items()
+                if path in known and known[path] != tuple(entry)
             ]
-            logging.info(f"Gefundene lokale Bilder: {len(image_files)} in {local_path}")
+            with db:
+                db.executemany("DELETE FROM images WHERE source = ? AND path = ?", removed)
+                db.executemany(
+                    "INSERT INTO images (source, path, size, mtime, local) VALUES (?, ?, ?, ?, ?)", added
+                )
+                db.executemany(
+                    "UPDATE images SET size = ?, mtime = ?, local = ?, width = NULL, height = NULL,"
+                    " orientation = NULL, taken = NULL, hash = NULL WHERE source = ? AND path = ?",
+                    changed
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO sources (source, recursive, scanned_at) VALUES (?, ?, ?)",
+                    (source, int(bool(recursive)), time.time())
+                )
+        if added or changed:
+            logging.debug(f"Index {source}: {len(added)} neu, {len(changed)} geändert, {len(removed)} entfernt")
+            self._wake.set()
+        return len(added), len(changed), len(removed)
+
+    def start_probe(self):
+        """Startet den Thread, der fehlende Metadaten nachträgt."""
+        if self._probe_thread is None:
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="image-index", daemon=True)
+            self._probe_thread.start()
+            self._wake.set()
+
+    def _probe_loop(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while True:
+                with self._lock:
+                    rows = self._db().execute(
+                        "SELECT source, path, local, size, mtime FROM images WHERE hash IS NULL LIMIT 50"
+                    ).fetchall()
+                if not rows:
+                    break
+                results = []
+                for source, path, local, size, mtime in rows:
+                    try:
+                        width, height, orientation, taken, content_hash = probe_image(local)
+                    except Exception:
+                        logging.debug(f"Index: Metadaten für {local} nicht lesbar", exc_info=True)
+                        width = height = orientation = taken = None
+                        content_hash = ''
+                    results.append((width, height, orientation, taken, content_hash, source, path, size, mtime))
+                with self._lock:
+                    with self._db() as db:
+                        # Nur übernehmen, wenn sich die Datei zwischenzeitlich nicht geändert hat
+                        db.executemany(
+                            "UPDATE images SET width = ?, height = ?, orientation = ?, taken = ?, hash = ?"
+                            " WHERE source = ? AND path = ? AND size = ? AND mtime = ?",
+                            results
+                        )
+
+    def record_probe(self, local, probe):
+        """Übernimmt Metadaten, die ein Ingest-Prozess bereits ermittelt hat."""
+        with self._lock:
+            with self._db() as db:
+                db.execute(
+                    "UPDATE images SET width = ?, height = ?, orientation = ?, taken = ?, hash = ?"
+                    " WHERE local = ? AND size = ? AND hash IS NULL",
+                    (probe['width'], probe['height'], probe['orientation'], probe['taken'], probe['hash'],
+                     local, probe['size'])
+                )
+
+    def metadata(self, local):
+        """
+        Untersuchte Metadaten {hash, orientation, width, height} zum lokalen
+        Pfad einer Datei oder None, solange sie fehlen oder die Datei nicht
+        mehr zum Indexstand passt.
+        """
+        with self._lock:
+            row = self._db().execute(
+                "SELECT source, size, mtime, hash, orientation, width, height FROM images"
+                " WHERE local = ? AND hash IS NOT NULL AND hash != ''", (local,)
+            ).fetchone()
+        if row is None:
+            return None
+        source, size, mtime, content_hash, orientation, width, height = row
+        try:
+            st = os.stat(local)
+        except OSError:
+            return None
+        # Bei SMB-Quellen ist mtime die des Servers; die Cache-Datei wird nur als Ganzes ersetzt
+        if st.st_size != size or (not source.startswith('smb://') and st.st_mtime != mtime):
+            return None
+        return {'hash': content_hash, 'orientation': orientation or 1, 'width': width, 'height': height}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+image_index = ImageIndex(IMAGE_INDEX_DB)
+
+
+class ImageCache:
+    """
+    Lokaler Dateicache für SMB-Bilder mit Index und Byte-Quota.
+
+    Dateien werden nach Quelle + Pfad geschlüsselt abgelegt, sodass gleich
+    benannte Dateien verschiedener Freigaben sich nicht überschreiben. Der
+    Index (index.json) hält Größe und letzte Nutzung je Datei; über die
+    Quota hinaus werden die am längsten nicht genutzten Dateien entfernt,
+    die von keiner aktuellen Playlist referenziert werden.
+    """
+
+    INDEX_NAME = 'index.json'
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None
+        self._pinned = {}
+        self._dirty = False
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, self.INDEX_NAME)
+        try:
+            with open(index_path, 'r') as f:
+                entries = json.load(f).get('files', {})
+        except FileNotFoundError:
+            entries = {}
         except Exception:
-            logging.exception(f"Fehler beim Lesen des lokalen Pfads {local_path}")
-    else:
-        if local_path:
-            logging.error(f"Lokaler Pfad ist kein Verzeichnis: {local_path}")
-    return image_files
+            logging.exception(f"Fehler beim Lesen des Cache-Index {index_path}")
+            entries = {}
+        # Nicht indizierte Dateien (Altbestand, rotated_*) aufräumen
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            full = os.path.join(self.cache_dir, name)
+            if name in entries or name.startswith('.') or name == self.INDEX_NAME or not os.path.isfile(full):
+                continue
+            try:
+                os.remove(full)
+                removed += 1
+            except OSError:
+                logging.exception(f"Fehler beim Entfernen der Cache-Datei {full}")
+        if removed:
+            logging.info(f"Cache: {removed} nicht indizierte Dateien entfernt.")
+        self._entries = {
+            name: entry for name, entry in entries.items()
+            if os.path.isfile(os.path.join(self.cache_dir, name))
+        }
+        self._dirty = len(self._entries) != len(entries)
+
+    def path_for(self, source, remote_path):
+        """Liefert den Cache-Pfad für remote_path der Quelle source."""
+        with self._lock:
+            # Index vor dem ersten Download laden, sonst gelten neue Dateien als verwaist
+            self._load()
+        digest = hashlib.sha1(f"{source}|{remote_path}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{digest}_{os.path.basename(remote_path)}")
+
+    def add(self, local_path, source, remote_path, transfer=None):
+        name = os.path.basename(local_path)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(name, {})
+            entry.update(
+                source=source,
+                path=remote_path,
+                size=os.path.getsize(local_path),
+                last_used=entry.get('last_used', time.time())
+            )
+            if transfer:
+                # Zuletzt gemessene Übertragung: Bytes, Sekunden, Bytes/s
+                entry['transfer'] = transfer
+            self._entries[name] = entry
+            self._dirty = True
 
+    def touch(self, local_path):
+        """Vermerkt die Nutzung einer Datei (für die LRU-Reihenfolge)."""
+        name = os.path.basename(local_path)
+        with self._lock:
+            if self._entries is not None and name in self._entries:
+                self._entries[name]['last_used'] = time.time()
+                self._dirty = True
 
-def prefetch_smb_images(smb_path, username, password, domain):
+    def remove(self, local_path):
+        name = os.path.basename(local_path)
+        with self._lock:
+            self._load()
+            if self._entries.pop(name, None) is not None:
+                self._dirty = True
+        try:
+            os.remove(local_path)
+        except FileNotFoundError:
+            pass
+
+    def pin(self, source, local_paths):
+        """Schützt die Dateien der aktuellen Playlist einer Quelle vor Verdrängung."""
+        with self._lock:
+            self._pinned[source] = {os.path.basename(p) for p in local_paths}
+
+    def retain_pins(self, sources):
+        """Gibt die Dateien nicht mehr konfigurierter Quellen für die Verdrängung frei."""
+        with self._lock:
+            for source in set(self._pinned) - set(sources):
+                del self._pinned[source]
+                logging.info(f"Cache: Quelle {source} nicht mehr konfiguriert, Dateien freigegeben.")
+
+    def enforce_quota(self):
+        """Verdrängt LRU-Dateien, bis die Byte-Quota eingehalten wird."""
+        with self._lock:
+            self._load()
+            total = sum(entry.get('size', 0) for entry in self._entries.values())
+            if total <= self.max_bytes:
+                return
+            pinned = set().union(*self._pinned.values()) if self._pinned else set()
+            candidates = sorted(
+                (entry.get('last_used', 0), name)
+                for name, entry in self._entries.items()
+                if name not in pinned
+            )
+            evicted = 0
+            for _, name in candidates:
+                if total <= self.max_bytes:
+                    break
+                total -= self._entries.pop(name).get('size', 0)
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:
+                    pass
+                evicted += 1
+            self._dirty = self._dirty or evicted > 0
+        if evicted:
+            logging.info(f"Cache-Quota: {evicted} Dateien verdrängt.")
+        if total > self.max_bytes:
+            logging.warning(
+                f"Cache-Quota ({self.max_bytes // (1024 * 1024)} MB) reicht nicht für die "
+                f"aktuellen Playlists ({total // (1024 * 1024)} MB)."
+            )
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            index_path = os.path.join(self.cache_dir, self.INDEX_NAME)
+            tmp_path = f"{index_path}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump({'files': self._entries}, f)
+                os.replace(tmp_path, index_path)
+                self._dirty = False
+            except Exception:
+                logging.exception(f"Fehler beim Schreiben des Cache-Index {index_path}")
+
+
+image_cache = ImageCache(CACHE_DIR, 1024 * 1024 * 1024)
+
+
+def smb_manifest_path(cache_dir, smb_path):
+    digest = hashlib.sha1(smb_path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(cache_dir, f".manifest_{digest}.json")
+
+
+def load_smb_manifest(manifest_path):
+    """
+    Lädt ein Sync-Manifest früherer Versionen ({dateiname: {size, mtime, local}}),
+    damit bereits geladene Dateien beim Umstieg auf den Bildindex nicht neu
+    übertragen werden.
+    """
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f).get('files', {})
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        logging.exception(f"Fehler beim Lesen des SMB-Manifests {manifest_path}")
+        return {}
+
+
+def list_smb_images(conn, share, remote_path, recursive):
+    """Listet die Bilder einer Freigabe per listPath; liefert [(relativer Pfad, SharedFile)]."""
     supported_extensions = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+    found = []
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        directory = f"{remote_path.rstrip('/')}/{rel_dir}" if rel_dir else remote_path
+        for f in conn.listPath(share, directory):
+            name = f.filename
+            if name in ('.', '..'):
+                continue
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            if f.isDirectory:
+                if recursive and not name.startswith('.'):
+                    pending.append(rel)
+            elif name.lower().endswith(supported_extensions):
+                found.append((rel, f))
+    return found
+
+
+class TokenBucket:
+    """
+    Gemeinsame Bandbreitengrenze aller SMB-Downloads in Bytes/s (0 = unbegrenzt).
+    Vor jedem geschriebenen Block wird dessen Größe entnommen; reicht das Guthaben nicht,
+    wartet der Download-Thread, bis es nachgelaufen ist. Das Guthaben ist auf
+    eine Sekunde begrenzt, damit nach einer Pause kein großer Burst entsteht.
+    """
+
+    def __init__(self, rate=0):
+        self._lock = threading.Lock()
+        self.rate = rate
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+
+    def configure(self, rate):
+        with self._lock:
+            if rate != self.rate:
+                self.rate = rate
+                self._tokens = 0.0
+                self._stamp = time.monotonic()
+
+    def consume(self, amount):
+        with self._lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+smb_bandwidth = TokenBucket()
+# Zeitfenster für vollständige Abgleiche; außerhalb wird nur gelistet (leer = immer vollständig)
+smb_sync_policy = {'full_windows': [], 'jitter': 30}
+
+
+def full_sync_allowed(when):
+    """True, wenn zu `when` Dateien übertragen werden dürfen."""
+    windows = smb_sync_policy['full_windows']
+    if not windows:
+        return True
+    if not isinstance(windows[0], (list, tuple)):
+        windows = [windows]
+    return any(in_time_window(window, when) for window in windows)
+
+
+def sync_delay(interval):
+    """Abstand bis zum nächsten Abgleich mit zufälligem Versatz, damit nicht alle Geräte gleichzeitig das NAS abfragen."""
+    return interval + random.uniform(0, max(0, smb_sync_policy['jitter']))
+
+
+class ThrottledWriter:
+    """
+    Ziel für retrieveFile(): schreibt die empfangenen Blöcke in out, zählt den
+    Offset mit und entnimmt vor jedem Block dessen Größe aus smb_bandwidth.
+    So läuft eine Datei in einem einzigen SMB-Aufruf (ein Open/Close) und
+    hält die Bandbreitengrenze trotzdem ein.
+    """
+
+    def __init__(self, out, offset):
+        self.out = out
+        self.offset = offset
+
+    def write(self, data):
+        smb_bandwidth.consume(len(data))
+        self.out.write(data)
+        self.offset += len(data)
+        return len(data)
+
+
+def partial_path(cache_path, size, mtime):
+    """
+    Temporäre Datei für eine laufende Übertragung. Der führende Punkt schützt
+    sie vor dem Aufräumen des ImageCache; Größe und Änderungszeit im Namen
+    sorgen dafür, dass nur eine Übertragung derselben Dateiversion fortgesetzt wird.
+    """
+    directory, name = os.path.split(cache_path)
+    return os.path.join(directory, f".{name}.{size}-{int(mtime or 0)}.part")
+
+
+def list_partials(directory):
+    """Teilstücke abgebrochener Übertragungen in directory als {Name der Zieldatei: [Teilstück, ...]}."""
+    partials = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return partials
+    for candidate in names:
+        if candidate.startswith('.') and candidate.endswith('.part'):
+            partials.setdefault(candidate[1:].rsplit('.', 2)[0], []).append(candidate)
+    return partials
+
+
+def remove_stale_partials(cache_path, keep, partials):
+    """Entfernt abgebrochene Übertragungen älterer Versionen von cache_path (partials aus list_partials())."""
+    directory, name = os.path.split(cache_path)
+    for candidate in partials.get(name, ()):
+        path = os.path.join(directory, candidate)
+        if path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def transfer_smb_file(conn, share, remote_file, cache_path, size, mtime, expected_hash=None, partials=None):
+    """
+    Überträgt remote_file in einem Zug in eine temporäre Datei neben cache_path
+    und benennt sie erst nach erfolgreicher Prüfung (Größe, optional SHA-1)
+    atomar um – Render-Loop und Web-Vorschau sehen nie ein halbes Bild.
+    Ein abgebrochener Transfer derselben Dateiversion wird ab dem bereits
+    geladenen Offset fortgesetzt. Das Teilstück ist für die Dauer der
+    Übertragung exklusiv gesperrt; ein zweiter Schreiber bricht ab.
+    partials sind die vor dem Abgleich vorgefundenen Teilstücke
+    (list_partials()); ohne sie wird das Verzeichnis gelesen.
+    Liefert {bytes, seconds, rate, resumed}.
+    """
+    part = partial_path(cache_path, size, mtime)
+    if partials is None:
+        partials = list_partials(os.path.dirname(cache_path))
+    remove_stale_partials(cache_path, part, partials)
+    out = os.fdopen(os.open(part, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+    try:
+        fcntl.flock(out, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        out.close()
+        raise IOError(f"{remote_file} wird bereits übertragen")
+    with out:
+        offset = out.seek(0, os.SEEK_END)
+        if offset > size:
+            out.truncate(0)
+            offset = 0
+        resumed = offset
+        if offset:
+            # Das Ende des Teilstücks erneut lesen: passt es nicht mehr, von vorn beginnen
+            check = min(offset, SMB_RESUME_CHECK)
+            probe = io.BytesIO()
+            smb_bandwidth.consume(check)
+            conn.retrieveFileFromOffset(share, remote_file, probe, offset - check, check)
+            out.seek(offset - check)
+            if probe.getvalue() != out.read(check):
+                logging.warning(f"Teilübertragung von {remote_file} passt nicht zur Quelle, starte neu.")
+                out.truncate(0)
+                offset = resumed = 0
+            else:
+                logging.info(f"Setze Übertragung von {remote_file} bei {offset} von {size} Bytes fort.")
+        out.seek(offset)
+
+        started = time.monotonic()
+        writer = ThrottledWriter(out, offset)
+        try:
+            if offset:
+                # Lesen ab Offset nur zum Fortsetzen
+                conn.retrieveFileFromOffset(share, remote_file, writer, offset)
+            elif size:
+                conn.retrieveFile(share, remote_file, writer)
+            out.flush()
+        except Exception:
+            # Leere Teilstücke (z.B. Zugriff verweigert) nicht liegen lassen
+            if out.tell() == 0:
+                os.remove(part)
+            raise
+        seconds = time.monotonic() - started
+
+        actual = os.fstat(out.fileno()).st_size
+        if actual != size:
+            if actual > size:
+                os.remove(part)
+            raise IOError(f"Unvollständige Übertragung von {remote_file}: {actual} von {size} Bytes")
+        if expected_hash and file_sha1(part) != expected_hash:
+            os.remove(part)
+            raise IOError(f"Prüfsumme von {remote_file} stimmt nicht")
+        # Umbenennen, solange die Sperre noch gehalten wird
+        os.replace(part, cache_path)
+
+    transferred = size - resumed
+    rate = transferred / seconds if seconds > 0 else 0.0
+    logging.debug(
+        f"{remote_file}: {transferred / 1e6:.2f} MB in {seconds:.2f} s "
+        f"({rate / 1e6:.2f} MB/s{', fortgesetzt' if resumed else ''})"
+    )
+    return {'bytes': transferred, 'seconds': round(seconds, 3), 'rate': round(rate), 'resumed': resumed}
+
+
+def download_smb_files(jobs, share, username, password, domain, server, concurrency, partials=None):
+    """
+    Lädt jobs [(remote_file, cache_path, size, mtime, hash), ...] über bis zu
+    `concurrency` parallele SMB-Sitzungen. Die Slots arbeiten die Jobs in der
+    übergebenen Reihenfolge ab (siehe download_order()).
+    Liefert {cache_path: Übertragungsstatistik} der erfolgreich geladenen Dateien.
+    """
+    if partials is None and jobs:
+        # Einmal je Abgleich statt je Datei: bei großen Freigaben wäre das quadratisch
+        partials = list_partials(os.path.dirname(jobs[0][1]))
+    pending = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+    done = {}
+    done_lock = threading.Lock()
+
+    def worker(slot):
+        with smb_connection(username, password, domain, "slideshow_client", server, server, slot) as conn:
+            if not conn:
+                return
+            while True:
+                try:
+                    remote_file, cache_path, size, mtime, expected_hash = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    stats = transfer_smb_file(
+                        conn, share, remote_file, cache_path, size, mtime, expected_hash, partials
+                    )
+                except SMB_CONNECTION_ERRORS:
+                    # Teilstück bleibt für die Fortsetzung liegen; die Datei übernimmt ein anderer Slot
+                    logging.exception(f"Verbindungsfehler beim Laden von {remote_file} (Slot {slot})")
+                    pending.put((remote_file, cache_path, size, mtime, expected_hash))
+                    # Sitzung ist defekt – Slot beenden, der Pool verwirft sie
+                    raise
+                except Exception:
+                    # Nur diese Datei betroffen (Zugriff verweigert, gesperrt, Prüfung fehlgeschlagen)
+                    logging.exception(f"Fehler beim Laden von {remote_file} (Slot {slot})")
+                    continue
+                with done_lock:
+                    done[cache_path] = stats
+
+    def run(slot):
+        try:
+            worker(slot)
+        except Exception:
+            logging.warning(f"SMB-Download-Slot {slot} beendet; die Sitzung wird beim nächsten Zugriff neu aufgebaut.")
+
+    threads = [
+        threading.Thread(target=run, args=(slot,), name=f"smb-download-{slot}", daemon=True)
+        # Slot 0 bleibt den Listings vorbehalten, sonst warten andere Panes auf alle Downloads dieses Slots
+        for slot in range(1, max(1, min(concurrency, len(jobs))) + 1)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if done:
+        total = sum(stats['bytes'] for stats in done.values())
+        seconds = sum(stats['seconds'] for stats in done.values())
+        logging.info(
+            f"{len(done)} Dateien übertragen: {total / 1e6:.1f} MB, "
+            f"{total / seconds / 1e6 if seconds else 0:.2f} MB/s je Sitzung"
+        )
+    return done
+
+
+def download_order(jobs, names, priority, options):
+    """
+    Sortiert Download-Jobs in Wiedergabereihenfolge: zuerst die Dateien, die
+    die Playlist als Nächstes zeigt (priority, lokale Pfade), danach der Rest
+    nach der Reihenfolge der Pane. names ordnet jedem Cache-Pfad seinen Pfad
+    in der Freigabe zu; beim Mischen bleibt die Listing-Reihenfolge.
+    """
+    order = options.get('order', 'name')
+    if order in ('mtime', 'exif_date'):
+        # Das Aufnahmedatum ist erst nach dem Laden bekannt; bis dahin zählt wie in der Playlist die Änderungszeit
+        jobs = sorted(jobs, key=lambda job: (job[3], names[job[1]].lower()))
+    elif order != 'shuffle':
+        jobs = sorted(jobs, key=lambda job: names[job[1]].lower())
+    if options.get('reverse') and order != 'shuffle':
+        jobs.reverse()
+    rank = {path: n for n, path in enumerate(priority)}
+    return sorted(jobs, key=lambda job: rank.get(job[1], len(rank)))
+
+
+smb_sync_locks = {}
+smb_sync_locks_guard = threading.Lock()
+
+
+def smb_sync_lock(source):
+    """Sperre je Freigabe: gleichzeitige Abgleiche würden in dieselben Cache- und Teildateien schreiben."""
+    with smb_sync_locks_guard:
+        return smb_sync_locks.setdefault(source, threading.Lock())
+
+
+class SourceUnavailable(Exception):
+    """Eine Bildquelle ist gerade nicht erreichbar; der letzte Stand aus dem Cache bleibt gültig."""
+
+
+def prefetch_smb_images(smb_path, username, password, domain, concurrency=1, recursive=False, cached=False,
+                        force=False, priority=(), order=None):
+    """
+    Synchronisiert eine SMB-Freigabe inkrementell in den lokalen Cache.
+
+    Anhand von Größe und Änderungszeit aus listPath() (auf Wunsch rekursiv)
+    werden gegen den Bildindex nur neue oder geänderte Dateien geladen
+    (parallel über `concurrency` Sitzungen); auf dem Server entfernte
+    Dateien werden auch lokal gelöscht. Mit cached=True wird ohne Listing
+    direkt der Indexstand verwendet. Liefert die lokalen Pfade.
+
+    Außerhalb der Fenster für vollständige Abgleiche wird nur gelistet:
+    neue und geänderte Dateien werden bis zum nächsten Fenster
+    zurückgestellt, solange die Quelle schon Bilder im Cache hat.
+    force=True (Reload über das Webinterface) überträgt immer.
+
+    Geladen wird in Wiedergabereihenfolge: zuerst die lokalen Pfade aus
+    priority (die nächsten Bilder der Playlist), dann nach den
+    Playlist-Optionen order ({order, reverse}).
+    """
     match = re.match(r'smb://([^/]+)/([^/]+)/(.*)', smb_path)
     if not match:
         logging.error(f"Ungültiges SMB-Pfadformat: {smb_path}")
         return []
     server, share, remote_path = match.groups()
 
-    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'cache')
-    os.makedirs(cache_dir, exist_ok=True)
+    if cached and image_index.scanned(smb_path, recursive):
+        local_files = [local for local in image_index.files(smb_path) if os.path.isfile(local)]
+        if local_files:
+            image_cache.pin(smb_path, local_files)
+            logging.info(f"SMB-Bilder aus dem Index: {len(local_files)} für {smb_path}")
+            return local_files
 
-    local_files = []
-    logging.info(f"Starte SMB-Prefetch: {smb_path} (Domain={domain})")
-    with smb_connection(username, password, domain, "slideshow_client", server, server) as conn:
-        if conn:
+    source = f"smb://{server}/{share}"
+    # Panes mit derselben Freigabe gleichen nacheinander ab; die zweite findet die Dateien dann im Cache vor
+    with smb_sync_lock(source):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        known = image_index.entries(smb_path)
+        manifest_path = smb_manifest_path(CACHE_DIR, smb_path)
+        if not known:
+            known = load_smb_manifest(manifest_path)
+
+        logging.info(f"Starte SMB-Sync: {smb_path} (Domain={domain})")
+        listing = []
+        jobs = []
+        try:
+            with smb_connection(username, password, domain, "slideshow_client", server, server) as conn:
+                if not conn:
+                    raise SourceUnavailable(f"Keine Verbindung zu {server}")
+                files = list_smb_images(conn, share, remote_path, recursive)
+        except SourceUnavailable:
+            raise
+        except Exception as e:
+            # Die Sitzung wurde vom Pool bereits verworfen
+            logging.exception(f"Fehler beim Listen des SMB-Verzeichnisses {remote_path}")
+            raise SourceUnavailable(f"Listing von {remote_path} fehlgeschlagen: {e}") from e
+
+        full = (
+            force or full_sync_allowed(time.time()) or
+            not any(previous.get('local') and os.path.isfile(previous['local']) for previous in known.values())
+        )
+        deferred = {}
+        names = {}
+        for rel, f in files:
+            remote_file = os.path.join(remote_path, rel).replace('\\', '/')
+            cache_path = image_cache.path_for(source, remote_file)
+            entry = {'size': f.file_size, 'mtime': f.last_write_time, 'local': cache_path}
+            previous = known.get(rel)
+            unchanged = (
+                previous is not None and
+                previous.get('size') == entry['size'] and
+                previous.get('mtime') == entry['mtime'] and
+                os.path.isfile(cache_path) and
+                os.path.getsize(cache_path) == entry['size']
+            )
+            if not unchanged:
+                # Bei unveränderter Version (nur lokale Kopie fehlt) ist die Prüfsumme bekannt
+                same_version = (
+                    previous is not None and
+                    previous.get('size') == entry['size'] and
+                    previous.get('mtime') == entry['mtime']
+                )
+                expected_hash = previous.get('hash') if same_version else None
+                if full:
+                    jobs.append((remote_file, cache_path, entry['size'], entry['mtime'], expected_hash))
+                    names[cache_path] = rel
+                else:
+                    deferred[rel] = previous
+            listing.append((rel, remote_file, entry))
+
+        jobs = download_order(jobs, names, priority, order or {})
+        downloaded = download_smb_files(jobs, share, username, password, domain, server, concurrency) if jobs else {}
+        failed = {job[1] for job in jobs} - set(downloaded)
+
+        synced = {}
+        for rel, remote_file, entry in listing:
+            if rel in deferred:
+                previous = deferred[rel]
+                if previous is not None and os.path.isfile(entry['local']):
+                    # Alte Version spielt weiter; der Index behält ihren Stand, damit sie später geladen wird
+                    synced[rel] = (previous.get('size'), previous.get('mtime'), entry['local'])
+                    image_cache.add(entry['local'], source, remote_file)
+                continue
+            if entry['local'] in failed:
+                continue
+            synced[rel] = (entry['size'], entry['mtime'], entry['local'])
+            image_cache.add(entry['local'], source, remote_file, downloaded.get(entry['local']))
+        removed = 0
+        listed = {rel for rel, _, _ in listing}
+        for rel, previous in known.items():
+            if rel in listed or not previous.get('local'):
+                continue
             try:
-                files = conn.listPath(share, remote_path)
-                count = 0
-                for f in files:
-                    name = f.filename
-                    if name in ('.', '..') or not name.lower().endswith(supported_extensions):
-                        continue
-                    remote_file = os.path.join(remote_path, name).replace('\\', '/')
-                    cache_path = os.path.join(cache_dir, name)
-                    with open(cache_path, 'wb') as out:
-                        conn.retrieveFile(share, remote_file, out)
-                    local_files.append(cache_path)
-                    count += 1
-                logging.info(f"SMB-Prefetch abgeschlossen: {count} Dateien heruntergeladen.")
+                image_cache.remove(previous['local'])
+                removed += 1
             except Exception:
-                logging.exception(f"Fehler beim Listen des SMB-Verzeichnisses {remote_path}")
-        else:
-            logging.error(f"SMB-Prefetch: Keine Verbindung zu {server}")
-    return local_files
+                logging.exception(f"Fehler beim Entfernen der Cache-Datei {previous.get('local')}")
+        image_index.sync(smb_path, recursive, synced)
+        if os.path.exists(manifest_path):
+            # Altes Manifest ist in den Index übernommen
+            os.remove(manifest_path)
+        local_files = image_index.files(smb_path)
+        image_cache.pin(smb_path, local_files)
+        image_cache.enforce_quota()
+        image_cache.save()
+        logging.info(
+            f"SMB-Sync abgeschlossen: {len(synced)} Dateien, {len(downloaded)} geladen, "
+            f"{len(failed)} fehlgeschlagen, {removed} entfernt"
+            f"{f', {len(deferred)} bis zum nächsten Sync-Fenster zurückgestellt' if deferred else ''}."
+        )
+        return local_files
+
+
+_fonts = {}
+_text_surfaces = OrderedDict()
+TEXT_CACHE_ENTRIES = 64
 
 
-def display_message(surface, message, infoObject):
+def get_font(size):
+    """Liefert die Systemschrift in `size`; die Schriftsuche erfolgt nur einmal je Größe."""
+    font = _fonts.get(size)
+    if font is None:
+        font = pygame.font.SysFont(None, size)
+        _fonts[size] = font
+    return font
+
+
+def render_text(line, size):
+    """Rendert eine Textzeile (weiß) und hält das Ergebnis für unveränderte Zeilen vor."""
+    key = (line, size)
+    text = _text_surfaces.get(key)
+    if text is None:
+        text = get_font(size).render(line, True, (255, 255, 255))
+        _text_surfaces[key] = text
+        while len(_text_surfaces) > TEXT_CACHE_ENTRIES:
+            _text_surfaces.popitem(last=False)
+    else:
+        _text_surfaces.move_to_end(key)
+    return text
+
+
+def display_message(surface, message):
+    """Zeichnet eine zentrierte Textmeldung auf surface (ohne Display-Flip)."""
     try:
-        font = pygame.font.SysFont(None, 48)
+        get_font(48)
     except Exception:
         logging.exception("Fehler beim Laden der Schriftart für Anzeige")
         sys.exit(1)
+    width, height = surface.get_size()
     lines = message.split('\n')
-    y = infoObject.current_h // 2 - len(lines) * 30
+    y = height // 2 - len(lines) * 30
     for line in lines:
-        text = font.render(line, True, (255, 255, 255))
-        rect = text.get_rect(center=(infoObject.current_w // 2, y))
+        text = render_text(line, 48)
+        rect = text.get_rect(center=(width // 2, y))
         surface.blit(text, rect)
         y += 60
-    pygame.display.flip()
 
 
 def get_ipv4_address():
@@ -198,7 +1231,7 @@ def get_ipv4_address():
             for addr in addrs.get(netifaces.AF_INET, []):
                 ip = addr.get('addr')
                 if ip and not ip.startswith('169.254.'):
-                    logging.info(f"Ermittelte IPv4-Adresse: {ip}")
+                    logging.debug(f"Ermittelte IPv4-Adresse: {ip}")
                     return ip
         logging.warning("Keine gültige IPv4-Adresse gefunden.")
     except Exception:
@@ -206,401 +1239,2029 @@ def get_ipv4_address():
     return "Nicht verfügbar"
 
 
+DEVICE_INFO_TTL = 10.0
+_device_info = {'static': None, 'text': None, 'expires': 0.0}
+
+
 def get_device_info():
-    info = [
-        f"Hostname: {socket.gethostname()}",
-        f"Betriebssystem: {platform.system()} {platform.release()}",
-        f"Python-Version: {platform.python_version()}",
-        f"CPU: {platform.processor() or 'Nicht verfügbar'}"
-    ]
-    try:
-        with open('/proc/meminfo', 'r') as mem:
-            mem_info = mem.read()
-        total_kb = int(re.search(r'MemTotal:\s+(\d+)', mem_info).group(1))
-        info.append(f"RAM: {total_kb // 1024} MB")
-    except Exception:
-        logging.exception("Fehler beim Lesen von /proc/meminfo")
-        info.append("RAM: Nicht verfügbar")
+    """
+    Liefert den Text des Info-Screens. Unveränderliche Angaben (System,
+    CPU, RAM) werden einmal ermittelt, Hostname und IP höchstens alle
+    DEVICE_INFO_TTL Sekunden.
+    """
+    now = time.time()
+    if _device_info['text'] is not None and now < _device_info['expires']:
+        return _device_info['text']
+    if _device_info['static'] is None:
+        static = [
+            f"Betriebssystem: {platform.system()} {platform.release()}",
+            f"Python-Version: {platform.python_version()}",
+            f"CPU: {platform.processor() or 'Nicht verfügbar'}"
+        ]
+        try:
+            with open('/proc/meminfo', 'r') as mem:
+                mem_info = mem.read()
+            total_kb = int(re.search(r'MemTotal:\s+(\d+)', mem_info).group(1))
+            static.append(f"RAM: {total_kb // 1024} MB")
+        except Exception:
+            logging.exception("Fehler beim Lesen von /proc/meminfo")
+            static.append("RAM: Nicht verfügbar")
+        _device_info['static'] = static
+    info = [f"Hostname: {socket.gethostname()}"] + _device_info['static']
     ip = get_ipv4_address()
     info.append(f"IPv4-Adresse: {ip}")
     info.append("")
     info.append("Die Slideshow kann über das Webinterface konfiguriert werden.")
-    logging.info("Geräteinformationen erstellt")
-    return '\n'.join(info)
-
-def fetch_images_from_config(cfg):
-    split_screen = cfg.get('split_screen', False)
-    if not split_screen:
-        path = cfg.get('image_path', '')
-        if path.startswith('smb://'):
-            imgs = prefetch_smb_images(
-                path,
-                cfg.get('smb_username', ''),
-                cfg.get('smb_password', ''),
-                cfg.get('smb_domain', '')
-            )
-        else:
-            imgs = get_local_image_files(path)
-        logging.info(f"Fetch fullscreen: {len(imgs)} Bilder")
-        return (imgs, [], [])
-    else:
-        left = cfg.get('image_path_left', '')
-        right = cfg.get('image_path_right', '')
-        if left.startswith('smb://'):
-            left_imgs = prefetch_smb_images(
-                left,
-                cfg.get('smb_username_left', ''),
-                cfg.get('smb_password_left', ''),
-                cfg.get('smb_domain_left', '')
-            )
-        else:
-            left_imgs = get_local_image_files(left)
-        if right.startswith('smb://'):
-            right_imgs = prefetch_smb_images(
-                right,
-                cfg.get('smb_username_right', ''),
-                cfg.get('smb_password_right', ''),
-                cfg.get('smb_domain_right', '')
-            )
-        else:
-            right_imgs = get_local_image_files(right)
-        logging.info(f"Fetch split: left={len(left_imgs)}, right={len(right_imgs)} Bilder")
-        return ([], left_imgs, right_imgs)
+    text = '\n'.join(info)
+    if text != _device_info['text']:
+        logging.info("Geräteinformationen erstellt")
+    _device_info['text'] = text
+    _device_info['expires'] = now + DEVICE_INFO_TTL
+    return text
 
 
-def main():
-    logging.info("Starte Slideshow-Programm")
-    try:
-        pygame.init()
-        pygame.mouse.set_visible(False)
-    except Exception:
-        logging.exception("Fehler beim Initialisieren von Pygame")
-        sys.exit(1)
+def pane_suffix(pane):
+    return '' if pane == 'fullscreen' else f'_{pane}'
 
-    try:
-        infoObject = pygame.display.Info()
-        screen = pygame.display.set_mode(
-            (infoObject.current_w, infoObject.current_h),
-            pygame.FULLSCREEN | pygame.NOFRAME
-        )
-        pygame.display.set_caption('Slideshow')
-    except Exception:
-        logging.exception("Fehler beim Einrichten des Pygame-Fensters")
-        sys.exit(1)
 
-    clock = pygame.time.Clock()
+slide_packs = slidepack.SlidePackCache()
 
-    # Config laden und Log-Level setzen
-    config = load_config()
-    lvl_name = config.get("log_level", "INFO").upper()
-    lvl = getattr(logging, lvl_name, logging.INFO)
-    for handler in logging.getLogger().handlers:
-        handler.setLevel(lvl)
-    logging.getLogger().setLevel(lvl)
-    logging.info(f"Log-Level auf {lvl_name} gesetzt")
 
-    stretch_images = config.get("stretch_images", True)
-    image_path = config.get('image_path', '')
-    left_path = config.get('image_path_left', '')
-    right_path = config.get('image_path_right', '')
+def pack_images(path):
+    """Playlist-Einträge eines Slide-Packs; ein fehlendes oder defektes Pack gilt als nicht erreichbar."""
+    try:
+        pack = slide_packs.open(path)
+    except (OSError, slidepack.SlidePackError) as e:
+        raise SourceUnavailable(f"Slide-Pack {path}: {e}") from e
+    return [slidepack.frame_key(path, n) for n in range(len(pack))]
 
-    image_files, left_images, right_images = fetch_images_from_config(config)
 
-    mode = config.get('mode', 'info')
-    mode_left = config.get('mode_left', 'slideshow')
-    mode_right = config.get('mode_right', 'slideshow')
-    split_screen = config.get('split_screen', False)
-    display_duration = config.get('display_duration', 5)
-    rotation = config.get('rotation', 0)
+def fetch_pane_images(spec, cached=False, force=False, priority=()):
+    path, username, password, domain = spec.source
+    if path.lower().endswith(slidepack.PACK_SUFFIX):
+        return pack_images(path)
+    if path.startswith('smb://'):
+        return prefetch_smb_images(
+            path, username, password, domain, spec.concurrency, spec.recursive, cached, force, priority, spec.playlist
+        )
+    return get_local_image_files(path, spec.recursive, cached)
 
+
+PLAYLIST_ORDERS = ('name', 'mtime', 'exif_date', 'shuffle')
+PLAYLIST_KEYS = ('order', 'reverse', 'weights', 'time_windows')
+
+
+def parse_clock(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def in_time_window(window, when):
+    """True, wenn `when` (Epoch) im Fenster ["HH:MM", "HH:MM"] liegt; Fenster über Mitternacht sind erlaubt."""
+    start, end = parse_clock(window[0]), parse_clock(window[1])
+    local = time.localtime(when)
+    minute = local.tm_hour * 60 + local.tm_min
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+def match_pattern(path, pattern):
+    """Vergleicht den Pfad eines Bildes in seiner Quelle (z.B. "alt/foo.jpg") und seinen Dateinamen mit pattern."""
+    path = path.replace(os.sep, '/')
+    return fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path.rsplit('/', 1)[-1], pattern)
+
+
+class Playlist:
+    """
+    Wiedergabereihenfolge einer Pane.
+
+    Die Bilder werden nach Name, Änderungszeit oder EXIF-Aufnahmedatum
+    sortiert oder je Durchlauf ohne Wiederholung gemischt. Gewichte
+    (Muster -> Anzahl je Durchlauf) lassen Bilder öfter erscheinen,
+    Zeitfenster (Muster -> ["HH:MM", "HH:MM"]) beschränken sie auf eine
+    Tageszeit. Die Durchläufe sind deterministisch (Seed aus Pane und
+    Durchlauf), sodass upcoming() die nächsten Bilder verlässlich vorhersagt
+    und Lookahead und Ingest genau diese vorwärmen können.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.images = []
+        self.options = {}
+        self.current = None
+        self.position = 0
+        self._queue = deque()
+        self._cycle = 0
+        # Guthaben des Smooth Weighted Round Robin, über die Durchläufe hinweg
+        self._credit = {}
+        # Lokaler Pfad -> Pfad in der Quelle; Gewichte und Zeitfenster gelten für letzteren
+        self._names = {}
+
+    def __len__(self):
+        return len(self.images)
+
+    def update(self, images, options, details=None):
+        """
+        Übernimmt Bildliste, Optionen und Metadaten ({Pfad: (mtime, Aufnahmedatum, Pfad in der Quelle)}).
+        Das aktuelle Bild bleibt stehen, wenn es weiterhin enthalten ist.
+        Ändern sich nur die Bilder, läuft der begonnene Durchlauf ohne die
+        entfernten weiter; neue Bilder kommen ab dem nächsten Durchlauf dazu.
+        """
+        options = dict(options)
+        names = self._names if details is None else {
+            local: path for local, (_, _, path) in details.items() if path
+        }
+        images = self._sorted(images, details or {}, options)
+        if images == self.images and options == self.options and names == self._names:
+            return
+        reorder = options != self.options or names != self._names or not self._queue
+        self.options = options
+        self._names = names
+        self.images = images
+        known = set(images)
+        self._credit = {path: credit for path, credit in self._credit.items() if path in known}
+        if self.current not in known:
+            self.current = None
+        if not reorder:
+            self._queue = deque(entry for entry in self._queue if entry[0] in known)
+            if self.current is None and self.images:
+                self.advance(time.time())
+            return
+        # Der Durchlaufzähler läuft weiter, sonst wiederholt sich die Mischung des ersten Durchlaufs
+        self._queue.clear()
+        if self.current is not None:
+            # Nach dem aktuellen Bild weiterspielen statt von vorn zu beginnen
+            self._fill()
+            for _ in range(len(self._queue)):
+                if self._queue[0][0] == self.current:
+                    self.position = self._queue.popleft()[1]
+                    break
+                self._queue.rotate(-1)
+        elif self.images:
+            self.advance(time.time())
+
+    def _sorted(self, images, details, options):
+        order = options.get('order', 'name')
+        if order not in PLAYLIST_ORDERS:
+            logging.error(f"Playlist {self.name}: unbekannte Reihenfolge {order!r}, sortiere nach Name")
+            order = 'name'
+
+        def mtime(path):
+            return details.get(path, (None, None, None))[0] or 0
+
+        def taken(path):
+            # EXIF "YYYY:MM:DD HH:MM:SS" ist lexikalisch sortierbar; ohne EXIF zählt die Änderungszeit
+            value = details.get(path, (None, None, None))[1]
+            return value or time.strftime('%Y:%m:%d %H:%M:%S', time.localtime(mtime(path)))
+
+        def name(path):
+            # SMB-Dateien liegen unter Hash-Präfixen im Cache; sortiert wird nach dem Pfad in der Quelle
+            return (details.get(path, (None, None, None))[2] or path).lower()
+
+        if order == 'mtime':
+            result = sorted(images, key=lambda path: (mtime(path), name(path)))
+        elif order == 'exif_date':
+            result = sorted(images, key=lambda path: (taken(path), name(path)))
+        else:
+            result = sorted(images, key=name)
+        if options.get('reverse') and order != 'shuffle':
+            result.reverse()
+        return result
+
+    def source_path(self, path):
+        """Pfad eines Bildes in seiner Quelle; SMB-Bilder liegen unter Hash-Präfixen im Cache."""
+        return self._names.get(path, path)
+
+    def weight(self, path):
+        for pattern, weight in (self.options.get('weights') or {}).items():
+            if match_pattern(self.source_path(path), pattern):
+                return max(0, int(weight))
+        return 1
+
+    def allowed(self, path, when):
+        windows = [
+            window for pattern, window in (self.options.get('time_windows') or {}).items()
+            if match_pattern(self.source_path(path), pattern)
+        ]
+        if not windows:
+            return True
+        # Ein Muster darf ein Fenster oder eine Liste von Fenstern haben
+        flat = [w for window in windows for w in (window if isinstance(window[0], (list, tuple)) else [window])]
+        return any(in_time_window(window, when) for window in flat)
+
+    def _fill(self):
+        """Hängt den nächsten Durchlauf an die Warteschlange an."""
+        weighted = [(path, n) for n, path in enumerate(self.images) for _ in range(self.weight(path))]
+        if not weighted:
+            return False
+        if self.options.get('order') == 'shuffle':
+            rng = random.Random(f"{self.name}:{self._cycle}:{len(self.images)}")
+            rng.shuffle(weighted)
+            # Keine direkte Wiederholung, auch nicht über die Durchlaufgrenze
+            previous = self._queue[-1][0] if self._queue else self.current
+            if len(weighted) == len(self.images):
+                if len(weighted) > 1 and weighted[0][0] == previous:
+                    weighted[0], weighted[-1] = weighted[-1], weighted[0]
+            else:
+                weighted = self._spread(weighted, previous)
+        elif len(weighted) > len(self.images):
+            # Mehrfach gewichtete Bilder per Smooth Weighted Round Robin gleichmäßig verteilen.
+            # Das Guthaben bleibt über die Durchläufe erhalten: wird ein Bild zurückgestellt,
+            # um es nicht direkt zu wiederholen, holt es das im nächsten Durchlauf nach.
+            weights = [(path, self.weight(path)) for path in self.images if self.weight(path)]
+            total = sum(weight for _, weight in weights)
+            credit = self._credit
+            previous = self._queue[-1][0] if self._queue else self.current
+            spread = []
+            for _ in range(total):
+                for path, weight in weights:
+                    credit[path] = credit.get(path, 0) + weight
+                ranked = sorted(weights, key=lambda entry: credit[entry[0]], reverse=True)
+                best = ranked[0][0]
+                if best == previous and len(ranked) > 1 and credit[ranked[1][0]] > 0:
+                    best = ranked[1][0]
+                credit[best] -= total
+                spread.append((best, 0))
+                previous = best
+            weighted = spread
+        self._queue.extend((path, position) for position, (path, _) in enumerate(weighted))
+        self._cycle += 1
+        return True
+
+    @staticmethod
+    def _spread(entries, previous):
+        """Ordnet gemischte, mehrfach vorkommende Einträge so, dass kein Bild direkt auf sich selbst folgt."""
+        remaining = {}
+        for path, n in entries:
+            remaining[path] = remaining.get(path, 0) + 1
+        result = []
+        pending = list(entries)
+        while pending:
+            top = max(remaining, key=remaining.get)
+            # Dominiert ein Bild den Rest, muss es jetzt kommen, sonst bleiben am Ende nur Wiederholungen
+            if top != previous and remaining[top] * 2 > len(pending):
+                pick = next(i for i, (path, _) in enumerate(pending) if path == top)
+            else:
+                pick = next((i for i, (path, _) in enumerate(pending) if path != previous), 0)
+            path, n = pending.pop(pick)
+            remaining[path] -= 1
+            if not remaining[path]:
+                del remaining[path]
+            result.append((path, n))
+            previous = path
+        return result
+
+    def upcoming(self, count, start=None, interval=0):
+        """
+        Die nächsten `count` Bilder ab dem aktuellen, ohne sie zu verbrauchen.
+        Mit start/interval werden Zeitfenster für den erwarteten Anzeigezeitpunkt
+        berücksichtigt.
+        """
+        result = []
+        i = 0
+        scanned = 0
+        while len(result) < count:
+            if i >= len(self._queue):
+                if not self._fill():
+                    break
+            path = self._queue[i][0]
+            i += 1
+            scanned += 1
+            if start is None or self.allowed(path, start + len(result) * interval):
+                result.append(path)
+            elif scanned > 2 * len(self.images) * max(1, count) + 2:
+                break
+        return result
+
+    def advance(self, now):
+        """Schaltet auf das nächste im Zeitfenster erlaubte Bild; None, wenn gerade keines erlaubt ist."""
+        for _ in range(2 * sum(self.weight(path) for path in self.images) + 1):
+            if not self._queue and not self._fill():
+                break
+            path, position = self._queue.popleft()
+            if self.allowed(path, now):
+                self.current, self.position = path, position
+                return path
+        self.current = None
+        return None
+
+
+SourceSnapshot = namedtuple('SourceSnapshot', 'pane generation images details ok')
+
+SYNC_BACKOFF_BASE = 15
+SYNC_BACKOFF_MAX = 1800
+
+
+class SourceSyncer:
+    """
+    Gleicht die Bildquellen der Panes in Hintergrund-Threads ab, damit ein
+    langsames oder nicht erreichbares SMB-Share nie den Render-Loop blockiert.
+
+    Je Pane läuft höchstens ein Abgleich; weitere Anforderungen ersetzen die
+    wartende. Ergebnisse werden als unveränderliche Snapshots abgelegt und
+    der Render-Loop per SOURCES_UPDATED-Event geweckt. Die Generation
+    erlaubt dem Loop, Ergebnisse zu einer inzwischen geänderten Quelle zu
+    verwerfen.
+
+    Ist eine Quelle nicht erreichbar, wird der letzte Stand aus dem Index
+    geliefert, soweit die Dateien lokal vorliegen (offline-first), und der
+    nächste Versuch mit exponentiellem Backoff samt Jitter geplant. Der
+    Zustand je Pane (letzter Erfolg, Fehlerzahl, nächster Versuch) steht in
+    health() für den Status-Socket bereit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._running = set()
+        self._results = []
+        self._health = {}
+
+    def request(self, pane, spec, generation, cached=False, force=False, priority=()):
+        """priority: die nächsten Bilder der Pane, deren Download vorgezogen wird."""
+        with self._lock:
+            self._pending[pane] = (spec, generation, cached, force, tuple(priority))
+            if pane in self._running:
+                return
+            self._running.add(pane)
+        threading.Thread(target=self._run, args=(pane,), name=f"sync-{pane}", daemon=True).start()
+
+    def busy(self, pane):
+        with self._lock:
+            return pane in self._running
+
+    def _run(self, pane):
+        while True:
+            with self._lock:
+                job = self._pending.pop(pane, None)
+                if job is None:
+                    self._running.discard(pane)
+                    return
+            spec, generation, cached, force, priority = job
+            source = spec.source[0]
+            try:
+                images = tuple(fetch_pane_images(spec, cached, force, priority))
+                ok = True
+                error = None
+            except Exception as e:
+                if not isinstance(e, SourceUnavailable):
+                    logging.exception(f"Abgleich der Quelle für {pane} fehlgeschlagen")
+                # Offline: der letzte Stand aus dem Index, soweit im Cache vorhanden
+                images = tuple(path for path in image_index.files(source) if os.path.isfile(path))
+                ok = False
+                error = str(e)
+            details = image_index.details(source)
+            with self._lock:
+                self._results.append(SourceSnapshot(pane, generation, images, details, ok))
+                self._record(pane, source, ok, error, len(images))
+            try:
+                pygame.event.post(pygame.event.Event(SOURCES_UPDATED, pane=pane))
+            except pygame.error:
+                # Display bereits beendet
+                pass
+
+    def _record(self, pane, source, ok, error, count):
+        now = time.time()
+        health = self._health.get(pane)
+        if health is None or health['source'] != source:
+            health = {'source': source, 'last_success': None, 'errors': 0}
+            self._health[pane] = health
+        health.update(ok=ok, checked=now, images=count)
+        if ok:
+            health.update(last_success=now, errors=0, last_error=None, retry_at=None)
+            return
+        health['errors'] += 1
+        health['last_error'] = error
+        health['retry_at'] = now + backoff_delay(health['errors'], SYNC_BACKOFF_BASE, SYNC_BACKOFF_MAX)
+        logging.warning(
+            f"Quelle {source} ({pane}) nicht erreichbar: {error}. Spiele {count} Bilder aus dem Cache, "
+            f"nächster Versuch in {health['retry_at'] - now:.0f} s (Fehler {health['errors']})."
+        )
+
+    def retry_at(self, pane):
+        """Zeitpunkt des nächsten Versuchs einer ausgefallenen Quelle, sonst None."""
+        with self._lock:
+            health = self._health.get(pane)
+            return health.get('retry_at') if health else None
+
+    def health(self, panes):
+        """Zustand der Quellen der angegebenen Panes, für den Status-Socket."""
+        with self._lock:
+            return {pane: dict(self._health[pane]) for pane in panes if pane in self._health}
+
+    def collect(self):
+        """Liefert die seit dem letzten Aufruf fertigen Snapshots."""
+        with self._lock:
+            results, self._results = self._results, []
+        return results
+
+
+PANE_MESSAGES = {
+    'fullscreen': ("Keine Bilder gefunden.", "Fehler beim Laden der Bilder."),
+    'left': ("Keine Bilder (links).", "Fehler beim Laden (links)."),
+    'right': ("Keine Bilder (rechts).", "Fehler beim Laden (rechts)."),
+}
+
+
+def pane_messages(pane):
+    """(Keine-Bilder-Meldung, Fehlermeldung) einer Pane."""
+    return PANE_MESSAGES.get(pane, (f"Keine Bilder ({pane}).", f"Fehler beim Laden ({pane})."))
+
+
+PaneSpec = namedtuple(
+    'PaneSpec', 'name rect mode source concurrency recursive duration rotation stretch_images playlist'
+)
+
+ConfigDiff = namedtuple('ConfigDiff', 'changed layout timing display reindex modes playlist reload')
+
+
+class ConfigWatcher:
+    """
+    Erkennt Änderungen an config.json über mtime/Größe/Inode, sodass die
+    Datei nur nach einer tatsächlichen Änderung neu geparst wird.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def changed(self):
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+
+def pane_layout(split_screen, screen_size):
+    """Liefert die Bildschirmbereiche je Pane für Vollbild bzw. Split-Screen."""
+    sw, sh = screen_size
     if split_screen:
-        if not left_images:
-            mode_left = "info"
-        if not right_images:
-            mode_right = "info"
-    else:
-        if not image_files:
-            mode = "info"
+        left_w = sw // 2
+        return {
+            'left': pygame.Rect(0, 0, left_w, sh),
+            'right': pygame.Rect(left_w, 0, sw - left_w, sh),
+        }
+    return {'fullscreen': pygame.Rect(0, 0, sw, sh)}
+
+
+def pane_rect(value, screen_size):
+    """
+    Wandelt [x, y, Breite, Höhe] in ein Rechteck auf dem Bildschirm um.
+    Sind alle Werte <= 1, gelten sie als Anteile der Bildschirmgröße,
+    sonst als Pixel. Das Ergebnis wird auf den Bildschirm beschnitten.
+    """
+    sw, sh = screen_size
+    x, y, w, h = (float(v) for v in value)
+    if max(x, y, w, h) <= 1:
+        x, w = round(x * sw), round(w * sw)
+        y, h = round(y * sh), round(h * sh)
+    return pygame.Rect(int(x), int(y), int(w), int(h)).clip(pygame.Rect(0, 0, sw, sh))
+
+
+def pane_specs(cfg, screen_size):
+    """
+    Liefert die Panes der Config als {Name: PaneSpec} in Zeichenreihenfolge.
+
+    Mit einer Liste "panes" ist jede Pane frei positionierbar und hat eigene
+    Quelle, Modus, Anzeigedauer, Rotation und Stretch; fehlende Werte kommen
+    aus den globalen Einstellungen. Ohne "panes" gilt das bisherige
+    Vollbild/Split-Screen-Layout mit den *_left/*_right-Schlüsseln.
+    """
+    duration = cfg.get('display_duration', 5)
+    rotation = cfg.get('rotation', 0)
+    stretch_images = cfg.get('stretch_images', True)
+    playlist = {key: cfg[key] for key in PLAYLIST_KEYS if key in cfg}
+    specs = OrderedDict()
+    if not cfg.get('panes'):
+        for pane, rect in pane_layout(cfg.get('split_screen', False), screen_size).items():
+            suffix = pane_suffix(pane)
+            specs[pane] = PaneSpec(
+                name=pane,
+                rect=rect,
+                mode=cfg.get('mode', 'info') if pane == 'fullscreen' else cfg.get(f'mode_{pane}', 'slideshow'),
+                source=(
+                    cfg.get(f'image_path{suffix}', ''),
+                    cfg.get(f'smb_username{suffix}', ''),
+                    cfg.get(f'smb_password{suffix}', ''),
+                    cfg.get(f'smb_domain{suffix}', ''),
+                ),
+                concurrency=int(cfg.get(f'smb_concurrency{suffix}', 3)),
+                recursive=bool(cfg.get('recursive', False)),
+                duration=duration,
+                rotation=rotation,
+                stretch_images=stretch_images,
+                playlist=playlist,
+            )
+        return specs
+    for number, entry in enumerate(cfg['panes'], 1):
+        name = str(entry.get('name') or f'pane{number}')
+        try:
+            rect = pane_rect(entry.get('rect', (0, 0, 1, 1)), screen_size)
+        except (TypeError, ValueError):
+            logging.error(f"Pane {name}: ungültiges rect {entry.get('rect')!r}, wird übersprungen")
+            continue
+        if name in specs or not rect.width or not rect.height:
+            logging.error(f"Pane {name}: doppelter Name oder leerer Bereich, wird übersprungen")
+            continue
+        specs[name] = PaneSpec(
+            name=name,
+            rect=rect,
+            mode=entry.get('mode', 'slideshow'),
+            source=(
+                entry.get('image_path', ''),
+                entry.get('smb_username', ''),
+                entry.get('smb_password', ''),
+                entry.get('smb_domain', ''),
+            ),
+            concurrency=int(entry.get('smb_concurrency', cfg.get('smb_concurrency', 3))),
+            recursive=bool(entry.get('recursive', cfg.get('recursive', False))),
+            duration=entry.get('display_duration', duration),
+            rotation=entry.get('rotation', rotation),
+            stretch_images=entry.get('stretch_images', stretch_images),
+            playlist={**playlist, **{key: entry[key] for key in PLAYLIST_KEYS if key in entry}},
+        )
+    return specs
+
+
+def diff_config(old, new, screen_size):
+    """Vergleicht zwei Konfigurationen und ordnet die Änderungen ihren Auswirkungen zu."""
+    changed = {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+    old_specs = pane_specs(old, screen_size)
+    new_specs = pane_specs(new, screen_size)
+    def source_of(spec):
+        return spec.source, spec.concurrency, spec.recursive
+
+    reindex = {
+        pane for pane, spec in new_specs.items()
+        if pane not in old_specs or source_of(old_specs[pane]) != source_of(spec)
+    }
+    modes = {
+        pane for pane, spec in new_specs.items()
+        if pane not in old_specs or old_specs[pane].mode != spec.mode
+    }
+    return ConfigDiff(
+        changed=changed,
+        layout=[(p, s.rect) for p, s in old_specs.items()] != [(p, s.rect) for p, s in new_specs.items()],
+        timing=any(old_specs[p].duration != spec.duration for p, spec in new_specs.items() if p in old_specs),
+        display=any(
+            (old_specs[p].rotation, old_specs[p].stretch_images) != (spec.rotation, spec.stretch_images)
+            for p, spec in new_specs.items() if p in old_specs
+        ),
+        reindex=reindex,
+        modes=modes,
+        playlist={
+            pane for pane, spec in new_specs.items()
+            if pane in old_specs and old_specs[pane].playlist != spec.playlist
+        },
+        reload=bool(new.get('reload', False)),
+    )
+
+
+def apply_log_level(cfg):
+    lvl_name = cfg.get("log_level", "INFO").upper()
+    lvl = getattr(logging, lvl_name, logging.INFO)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(lvl)
+    logging.getLogger().setLevel(lvl)
+    logging.info(f"Log-Level auf {lvl_name} gesetzt")
+
+
+def apply_sync_policy(cfg):
+    """Übernimmt Bandbreitengrenze, Sync-Fenster und Jitter für die SMB-Abgleiche."""
+    smb_bandwidth.configure(float(cfg.get('smb_bandwidth_mbit', 0)) * 125000)
+    smb_sync_policy['full_windows'] = cfg.get('smb_full_sync_windows') or []
+    smb_sync_policy['jitter'] = float(cfg.get('smb_sync_jitter', 30))
+
+
+class FrameCache:
+    """
+    Hält zuletzt komponierte Bild-Frames (rotiert und skaliert, im
+    Display-Pixelformat) je (Datei, Änderungszeit, Pane-Größe, Rotation,
+    Stretch) im Speicher, damit kurze Playlists nicht neu dekodiert werden.
+    Der Schlüssel enthält keine Pane, gleiche Bilder in gleich großen Panes
+    teilen sich also einen Eintrag. Begrenzt wird über die Gesamtgröße der
+    Flächen in Bytes, verdrängt wird der am längsten ungenutzte Frame.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _frame_bytes(frame):
+        return frame.get_pitch() * frame.get_height()
+
+    def get(self, key):
+        frame = self._frames.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._frames.move_to_end(key)
+        return frame
+
+    def put(self, key, frame):
+        old = self._frames.pop(key, None)
+        if old is not None:
+            self.bytes -= self._frame_bytes(old)
+        size = self._frame_bytes(frame)
+        if size > self.max_bytes:
+            return
+        self._frames[key] = frame
+        self.bytes += size
+        self._evict()
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self._frames:
+            _, frame = self._frames.popitem(last=False)
+            self.bytes -= self._frame_bytes(frame)
+
+    def stats(self):
+        return {
+            'entries': len(self._frames),
+            'mb': round(self.bytes / (1024 * 1024), 1),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def contains(self, image_file, size, rotation, stretch_images):
+        try:
+            return (image_file, os.path.getmtime(image_file), size, rotation, stretch_images) in self._frames
+        except OSError:
+            return False
+
+
+def surface_from_buffer(size, data):
+    """Übernimmt einen RGB-Puffer als Fläche im Pixelformat des Displays."""
+    return pygame.image.frombuffer(data, size, 'RGB').convert()
+
+
+def compose_image_frame(image_file, size, rotation, stretch_images):
+    """
+    Dekodiert, rotiert und skaliert ein Bild genau einmal im Speicher und
+    liefert eine fertig komponierte Pane-Fläche im Pixelformat des Displays.
+    """
+    img = decode_pane_image(image_file, size, rotation, stretch_images)
+    return surface_from_buffer(img.size, img.tobytes())
+
+
+def decode_pane_image(image_file, size, rotation, stretch_images):
+    """
+    Liefert ein Bild als RGB-Bild in exakt `size`, das ohne weitere
+    Bearbeitung geblittet werden kann (thread-sicher, kein pygame).
+    Vorhandene Derivate aus dem Ingest werden bevorzugt.
+    """
+    derivative = derivative_store.lookup(image_file, size, rotation, stretch_images)
+    if derivative:
+        derivative_store.touch(derivative)
+        try:
+            with Image.open(derivative) as img:
+                img = img.convert('RGB')
+            if img.size == tuple(size):
+                return img
+        except Exception:
+            logging.exception(f"Fehler beim Laden des Derivats {derivative}")
+    try:
+        img, _ = open_oriented(image_file, decode_target(size, rotation))
+    except DecodeBudgetError:
+        # Zu groß zum Dekodieren: aus der Kachelpyramide, falls eine vorliegt
+        directory = derivative_store.pyramid(image_file)
+        if directory is None:
+            raise
+        img = open_pyramid(directory, decode_target(size, rotation))
+    return scale_to_pane(img, size, rotation, stretch_images)
+
+
+class DerivativeStore:
+    """
+    Persistente, auf Anzeigegröße vorskalierte Derivate der Quellbilder.
+
+    Derivate sind nach Inhalt, Pane-Größe, Rotation, Stretch-Modus und
+    EXIF-Orientierung geschlüsselt und werden von einem Prozess-Pool über
+    alle CPU-Kerne erzeugt. Inhalt (SHA1) und Orientierung kommen aus dem
+    Bildindex, jede Datei wird also nur einmal gelesen. Der Render-Loop lädt
+    danach nur noch kleine, bereits ausgerichtete Dateien.
+
+    Wie beim ImageCache hält ein Index (usage.json) Größe und letzte Nutzung
+    je Derivat und Pyramide – die atime ist auf noatime-Dateisystemen nicht
+    verlässlich. Über die Quota hinaus werden die am längsten nicht
+    genutzten entfernt, ebenso alles, was MAX_AGE lang nicht angezeigt wurde.
+    """
+
+    INDEX_NAME = 'usage.json'
+    PRUNE_INTERVAL = 3600
+    MAX_AGE = 30 * 24 * 3600
+    # Gerade angezeigte Derivate und Pyramiden werden nicht verdrängt
+    IN_USE = 3600
+
+    def __init__(self, derivative_dir, max_bytes, workers=0):
+        self.derivative_dir = derivative_dir
+        self.max_bytes = max_bytes
+        self.workers = workers
+        # Ab dieser Kantenlänge (Pixel) wird zusätzlich eine Kachelpyramide erzeugt, 0 = nie
+        self.poster_min_side = 0
+        self.poster_max_bytes = 256 * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+        self._pending = {}
+        self._executor = None
+        self._poster_executor = None
+        # Inhalte, deren Pyramide nicht erzeugt werden konnte; nicht bei jedem Ingest erneut versuchen
+        self._no_pyramid = set()
+        # Pyramiden der Bilder aus dem letzten Ingest, für den Render-Loop ohne Index-Abfrage
+        self._pyramids = {}
+        self._last_prune = 0.0
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.derivative_dir, exist_ok=True)
+        index_path = os.path.join(self.derivative_dir, self.INDEX_NAME)
+        try:
+            with open(index_path, 'r') as f:
+                entries = json.load(f).get('files', {})
+        except FileNotFoundError:
+            entries = {}
+        except Exception:
+            logging.exception(f"Fehler beim Lesen des Derivat-Index {index_path}")
+            entries = {}
+        self._entries = {
+            name: entry for name, entry in entries.items()
+            if os.path.exists(os.path.join(self.derivative_dir, name))
+        }
+        # Nicht erfasste Derivate (Absturz vor dem Speichern) übernehmen, Reste abgebrochener Ingests entfernen
+        for directory, prefix in ((self.derivative_dir, ''), (os.path.join(self.derivative_dir, 'tiles'), 'tiles/')):
+            try:
+                found = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in found:
+                name = prefix + entry.name
+                if entry.name.endswith('.tmp'):
+                    if entry.is_dir():
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        os.remove(entry.path)
+                elif name not in self._entries and (
+                        entry.name.endswith('.jpg') if not prefix else entry.is_dir()):
+                    self._entries[name] = {'size': self._disk_size(entry.path), 'last_used': entry.stat().st_mtime}
+        self._dirty = self._entries != entries
+
+    @staticmethod
+    def _disk_size(path):
+        if not os.path.isdir(path):
+            return os.path.getsize(path)
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path) for name in names
+        )
+
+    def _name(self, path):
+        return os.path.relpath(path, self.derivative_dir).replace(os.sep, '/')
+
+    def touch(self, path):
+        """Vermerkt die Nutzung eines Derivats oder einer Pyramide (für die LRU-Reihenfolge)."""
+        name = self._name(path)
+        with self._lock:
+            if self._entries is not None and name in self._entries:
+                self._entries[name]['last_used'] = time.time()
+                self._dirty = True
+
+    def lookup(self, image_file, size, rotation, stretch_images):
+        """Liefert den Pfad des passenden Derivats oder None."""
+        meta = image_index.metadata(image_file)
+        if not meta:
+            return None
+        path = os.path.join(
+            self.derivative_dir,
+            derivative_name(meta['hash'], size, rotation, stretch_images, meta['orientation'])
+        )
+        return path if os.path.isfile(path) else None
+
+    def pyramid(self, image_file):
+        """Liefert das Verzeichnis der Kachelpyramide eines Bildes oder None."""
+        meta = image_index.metadata(image_file)
+        if not meta:
+            return None
+        directory = pyramid_dir(self.derivative_dir, meta['hash'])
+        return directory if os.path.isfile(os.path.join(directory, 'meta.json')) else None
+
+    def has_pyramid(self, image_file):
+        """Ob beim letzten Ingest eine Kachelpyramide vorlag oder seitdem entstanden ist (ohne Dateizugriff)."""
+        return self._pyramids.get(image_file) is not None
+
+    def _needs_pyramid(self, meta, pyramid):
+        return bool(
+            meta and self.poster_min_side and
+            max(meta['width'] or 0, meta['height'] or 0) >= self.poster_min_side and
+            meta['hash'] not in self._no_pyramid and
+            not pyramid
+        )
+
+    def ingest(self, jobs):
+        """
+        Reicht fehlende Derivate an den Prozess-Pool. jobs ist eine Liste
+        (Datei, Pane-Größe, Rotation, Stretch) in Prioritätsreihenfolge;
+        noch nicht gestartete Aufträge früherer Aufrufe werden verworfen.
+
+        Kachelpyramiden entstehen in einem eigenen Prozess, der Bild für Bild
+        arbeitet: sie verlangen das volle Dekodieren, und mehrere Poster
+        gleichzeitig würden den Speicher eines Raspberry Pi übersteigen.
+        """
+        with self._lock:
+            self._load()
+        self._maybe_prune()
+        jobs = [(f, tuple(size), rot, stretch) for f, size, rot, stretch in jobs]
+        tasks = []
+        pyramids = {}
+        for job in jobs:
+            image_file, size, rotation, stretch = job
+            meta = image_index.metadata(image_file)
+            if image_file not in pyramids:
+                pyramids[image_file] = self.pyramid(image_file)
+            if not self.lookup(*job):
+                tasks.append((job, False, (
+                    build_derivative, image_file, meta, size, rotation, stretch,
+                    self.derivative_dir, decode_limits['max_bytes']
+                )))
+            if self._needs_pyramid(meta, pyramids[image_file]):
+                tasks.append(((image_file, 'poster', meta['hash']), True, (
+                    build_poster, image_file, meta['hash'], self.derivative_dir, self.poster_max_bytes
+                )))
+        with self._lock:
+            self._pyramids = pyramids
+            wanted = {job for job, _, _ in tasks}
+            for job, future in list(self._pending.items()):
+                if job not in wanted and future.cancel():
+                    del self._pending[job]
+        submitted = 0
+        for job, poster, call in tasks:
+            with self._lock:
+                if job in self._pending:
+                    continue
+            future = self._get_executor(poster).submit(*call)
+            with self._lock:
+                self._pending[job] = future
+            future.add_done_callback(partial(self._done, job))
+            submitted += 1
+        if submitted:
+            logging.info(f"Ingest: {submitted} Derivate in Auftrag gegeben.")
+
+    def _get_executor(self, poster=False):
+        if poster:
+            if self._poster_executor is None:
+                self._poster_executor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                logging.info("Poster-Prozess gestartet.")
+            return self._poster_executor
+        if self._executor is None:
+            workers = self.workers or os.cpu_count() or 1
+            # spawn statt fork: der Render-Prozess hält SDL und mehrere Threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            logging.info(f"Ingest-Pool mit {workers} Prozessen gestartet.")
+        return self._executor
+
+    def _done(self, job, future):
+        with self._lock:
+            if self._pending.get(job) is future:
+                del self._pending[job]
+        if future.cancelled():
+            return
+        try:
+            info = future.result()
+        except DecodeBudgetError as e:
+            logging.error(f"Ingest übersprungen: {e}")
+            return
+        except Exception:
+            if job[1] == 'poster':
+                with self._lock:
+                    self._no_pyramid.add(job[2])
+            logging.exception(f"Ingest fehlgeschlagen: {job[0]}")
+            return
+        if info['probe']:
+            image_index.record_probe(info['path'], info['probe'])
+        with self._lock:
+            for path in info['outputs']:
+                name = self._name(path)
+                if name not in self._entries:
+                    self._entries[name] = {'size': self._disk_size(path), 'last_used': time.time()}
+                    self._dirty = True
+            if job[1] == 'poster':
+                self._pyramids[info['path']] = info['outputs'][0]
+            idle = not self._pending
+        logging.debug(f"Derivat erstellt: {job[0]}")
+        if idle:
+            self.save()
+
+    def _maybe_prune(self):
+        now = time.time()
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        self.enforce_quota()
+        self.save()
+
+    def enforce_quota(self):
+        """Entfernt lange ungenutzte Derivate und verdrängt LRU-Einträge, bis die Byte-Quota eingehalten wird."""
+        now = time.time()
+        with self._lock:
+            self._load()
+            total = sum(entry.get('size', 0) for entry in self._entries.values())
+            candidates = sorted(
+                (entry.get('last_used', 0), name)
+                for name, entry in self._entries.items()
+                if now - entry.get('last_used', 0) > self.IN_USE
+            )
+            removed = []
+            for last_used, name in candidates:
+                if total <= self.max_bytes and now - last_used <= self.MAX_AGE:
+                    break
+                total -= self._entries.pop(name).get('size', 0)
+                removed.append(os.path.join(self.derivative_dir, name))
+            self._dirty = self._dirty or bool(removed)
+        for path in removed:
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                logging.exception(f"Fehler beim Entfernen des Derivats {path}")
+        if removed:
+            logging.info(f"Derivate: {len(removed)} Dateien und Pyramiden entfernt.")
+        if total > self.max_bytes:
+            logging.warning(
+                f"Derivat-Quota ({self.max_bytes // (1024 * 1024)} MB) reicht nicht für die "
+                f"gerade genutzten Derivate ({total // (1024 * 1024)} MB)."
+            )
+
+    def save(self):
+        with self._lock:
+            if not self._dirty or self._entries is None:
+                return
+            index_path = os.path.join(self.derivative_dir, self.INDEX_NAME)
+            tmp_path = f"{index_path}.tmp"
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump({'files': self._entries}, f)
+                os.replace(tmp_path, index_path)
+                self._dirty = False
+            except Exception:
+                logging.exception(f"Fehler beim Schreiben des Derivat-Index {index_path}")
+
+    def shutdown(self):
+        for executor in (self._executor, self._poster_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._poster_executor = None
+        self.save()
+
+
+derivative_store = DerivativeStore(DERIVATIVE_DIR, 1024 * 1024 * 1024)
+
+
+INGEST_AHEAD = 20   # so viele kommende Bilder je Pane werden vorab als Derivat erzeugt
+
+
+def ingest_jobs(pane_states, specs):
+    """
+    Das aktuelle und die nächsten INGEST_AHEAD Bilder der Slideshow-Panes,
+    nach Abstand verzahnt. Das Fenster wandert mit jedem Bildwechsel weiter,
+    sodass auch große Playlists nie vollständig geprüft werden müssen.
+    """
+    orders = {}
+    for pane, (pane_mode, playlist) in pane_states.items():
+        if pane_mode != 'slideshow':
+            continue
+        order = list(dict.fromkeys([playlist.current] + playlist.upcoming(INGEST_AHEAD)))
+        # Slide-Packs sind bereits vorskaliert
+        orders[pane] = [path for path in order if path is not None and not slidepack.parse_frame_key(path)]
+    jobs = []
+    for step in range(max((len(order) for order in orders.values()), default=0)):
+        for pane, order in orders.items():
+            if step < len(order):
+                spec = specs[pane]
+                jobs.append((order[step], spec.rect.size, spec.rotation, spec.stretch_images))
+    return jobs
+
+
+def compose_info_frame(size, info_text, centered):
+    """Rendert den Info-Screen (Geräteinformationen) als Pane-Fläche."""
+    frame = pygame.Surface(size).convert()
+    frame.fill((0, 0, 0))
+    y0 = 50 if centered else 20
+    for line in info_text.split('\n'):
+        text = render_text(line, 36)
+        if centered:
+            frame.blit(text, text.get_rect(center=(size[0] // 2, y0)))
+        else:
+            frame.blit(text, (20, y0))
+        y0 += 40
+    return frame
+
+
+def compose_message_frame(size, message):
+    frame = pygame.Surface(size).convert()
+    frame.fill((0, 0, 0))
+    display_message(frame, message)
+    return frame
+
+
+_pack_size_warnings = set()
+
+
+def slide_pack_frame(pane, pack_frame, size):
+    """
+    Frame aus einem Slide-Pack, direkt aus dem Mapping geblittet – ohne
+    Dekodieren und ohne Frame-Cache. Rotation und Skalierung sind im Pack
+    bereits enthalten.
+    """
+    path, index = pack_frame
+    try:
+        frame = slide_packs.open(path).surface(index)
+    except Exception:
+        logging.exception(f"Fehler beim Anzeigen von Frame {index} aus {path} ({pane})")
+        return compose_message_frame(size, pane_messages(pane)[1])
+    if frame.get_size() != tuple(size):
+        # Pack für ein anderes Layout gebaut: skalieren statt nichts anzuzeigen
+        if (path, tuple(size)) not in _pack_size_warnings:
+            _pack_size_warnings.add((path, tuple(size)))
+            logging.warning(
+                f"Slide-Pack {path} hat {frame.get_width()}x{frame.get_height()}, "
+                f"Pane {pane} aber {size[0]}x{size[1]}; Frames werden skaliert."
+            )
+        frame = pygame.transform.smoothscale(frame, size)
+    return frame
+
+
+def build_pane_frame(pane, content, size, rotation, stretch_images, lookahead=None, frame_cache=None):
+    kind, value = content
+    if kind == 'slideshow':
+        pack_frame = slidepack.parse_frame_key(value)
+        if pack_frame:
+            return slide_pack_frame(pane, pack_frame, size)
+        try:
+            cache_key = (value, os.path.getmtime(value), size, rotation, stretch_images)
+        except OSError:
+            cache_key = None
+        frame = frame_cache.get(cache_key) if frame_cache and cache_key else None
+        if frame is not None:
+            return frame
+        data = lookahead.take((value, size, rotation, stretch_images)) if lookahead else None
+        try:
+            if data is not None:
+                frame = surface_from_buffer(*data)
+            else:
+                frame = compose_image_frame(value, size, rotation, stretch_images)
+        except DecodeBudgetError as e:
+            logging.error(f"Bild übersteigt das Dekodier-Budget: {e}")
+            return compose_message_frame(size, pane_messages(pane)[1])
+        except Exception:
+            logging.exception(f"Fehler beim Anzeigen des Bildes {value} ({pane})")
+            return compose_message_frame(size, pane_messages(pane)[1])
+        if frame_cache and cache_key:
+            frame_cache.put(cache_key, frame)
+        return frame
+    if kind == 'info':
+        return compose_info_frame(size, value, centered=(pane == 'fullscreen'))
+    return compose_message_frame(size, value)
+
+
+class GifAnimation:
+    """
+    Spielt ein animiertes GIF in einer Pane ab. Die Frames werden über
+    ImageSequence einzeln gestreamt, dekodiert ist immer nur der aktuelle
+    Frame. Passt die ganze Schleife skaliert in cache_bytes, werden die
+    fertigen Flächen behalten und ab dem zweiten Durchlauf nur noch geblittet.
+    """
+
+    # Browser zeigen Frames mit 0-10 ms als 100 ms an; GIFs sind darauf abgestimmt
+    DEFAULT_DURATION_MS = 100
+
+    def __init__(self, image_file, size, rotation, stretch_images, cache_bytes):
+        self.image_file = image_file
+        self.size = size
+        self.rotation = rotation
+        self.stretch_images = stretch_images
+        self._img = Image.open(image_file)
+        width, height = self._img.size
+        if width * height * 4 > decode_limits['max_bytes']:
+            self._img.close()
+            raise DecodeBudgetError(f"{image_file}: {width}x{height} übersteigt das Dekodier-Budget")
+        self.frame_count = getattr(self._img, 'n_frames', 1)
+        frame_bytes = size[0] * size[1] * 4
+        self._keep = self.frame_count * frame_bytes <= cache_bytes
+        self._frames = {}
+        self._durations = {}
+        self._iter = None
+        self._pos = 0
+        self.index = -1
+        self.surface = None
+        self.next_due = None
+
+    @classmethod
+    def open(cls, image_file, size, rotation, stretch_images, cache_bytes):
+        """Liefert eine Animation oder None, wenn die Datei kein animiertes GIF ist."""
+        if not image_file.lower().endswith('.gif'):
+            return None
+        try:
+            anim = cls(image_file, size, rotation, stretch_images, cache_bytes)
+        except DecodeBudgetError as e:
+            logging.error(f"Animation übersteigt das Dekodier-Budget: {e}")
+            return None
+        except Exception:
+            logging.exception(f"Fehler beim Öffnen der Animation {image_file}")
+            return None
+        if anim.frame_count < 2:
+            anim.close()
+            return None
+        anim.advance(time.time())
+        return anim
+
+    def _decode_next(self):
+        if self._iter is None:
+            self._iter = ImageSequence.Iterator(self._img)
+        try:
+            frame = self._iter[self._pos]
+        except IndexError:
+            self._pos = 0
+            frame = self._iter[0]
+        duration = frame.info.get('duration') or 0
+        self._pos += 1
+        img = scale_to_pane(frame.convert('RGBA'), self.size, self.rotation, self.stretch_images)
+        return surface_from_buffer(img.size, img.tobytes()), duration
+
+    def advance(self, now):
+        """Schaltet auf den nächsten Frame; liefert die neue Fläche."""
+        self.index = (self.index + 1) % self.frame_count
+        surface = self._frames.get(self.index)
+        if surface is None:
+            surface, duration = self._decode_next()
+            self._durations[self.index] = duration
+            if self._keep:
+                self._frames[self.index] = surface
+                if len(self._frames) == self.frame_count:
+                    # Ganze Schleife liegt skaliert vor, die Quelle wird nicht mehr gebraucht
+                    self._img.close()
+                    self._iter = None
+        duration = self._durations[self.index]
+        if duration <= 10:
+            duration = self.DEFAULT_DURATION_MS
+        # Verspätete Frames holen auf, ohne dass sich die Verzögerung aufsummiert
+        base = self.next_due if self.next_due and now - self.next_due < 0.25 else now
+        self.next_due = base + duration / 1000.0
+        self.surface = surface
+        return surface
+
+    def close(self):
+        self._frames.clear()
+        self._img.close()
+
+
+# Speicherobergrenze für geladene Kacheln aller Poster-Ansichten
+TILE_CACHE_BYTES = 32 * 1024 * 1024
+
+
+class PosterView:
+    """
+    Zeigt sehr große Bilder (Poster, Grundrisse) aus ihrer Kachelpyramide
+    mit langsamem Ken-Burns-Schwenk. Je Frame werden nur die sichtbaren
+    Kacheln der Stufe geladen, deren Auflösung dem Ausschnitt am nächsten
+    kommt. Speicher belegen nur der gemeinsame Kachel-Cache und zwei
+    Flächen in etwa Pane-Größe, unabhängig von der Größe des Quellbildes.
+    """
+
+    def __init__(self, image_file, directory, size, rotation, stretch_images, duration, fps, zoom, tile_cache):
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        self.directory = directory
+        self.tile = meta['tile']
+        self.levels = meta['levels']
+        self.rotation = rotation % 360
+        # Bei 90°/270° wird hochkant komponiert und das Ergebnis gedreht
+        self.compose_size = (size[1], size[0]) if self.rotation in (90, 270) else tuple(size)
+        self.duration = max(1.0, duration)
+        self.interval = 1.0 / max(1, fps)
+        self.tile_cache = tile_cache
+        self._frame = pygame.Surface(self.compose_size).convert()
+        self._scratch = None
+        self._path = self._ken_burns(image_file, zoom, stretch_images)
+        self.started = time.time()
+        self.surface = None
+        self.next_due = None
+
+    @classmethod
+    def open(cls, image_file, size, rotation, stretch_images, duration, fps, zoom, tile_cache):
+        """Liefert eine Ansicht oder None, wenn für das Bild keine Kachelpyramide vorliegt."""
+        if rotation % 90:
+            return None
+        directory = derivative_store.pyramid(image_file)
+        if directory is None:
+            return None
+        derivative_store.touch(directory)
+        try:
+            view = cls(image_file, directory, size, rotation, stretch_images, duration, fps, zoom, tile_cache)
+            view.advance(time.time())
+        except Exception:
+            logging.exception(f"Fehler beim Öffnen der Kachelpyramide von {image_file}")
+            return None
+        return view
+
+    def _ken_burns(self, image_file, zoom, stretch_images):
+        """
+        Start- und Endausschnitt (x, y, Breite, Höhe) in Pixeln der Stufe 0,
+        je Bild reproduzierbar. Die Gesamtansicht zeigt wie bei normalen
+        Bildern das ganze Bild: gestreckt oder eingepasst mit schwarzen
+        Rändern; der Ausschnitt darf dafür über das Bild hinausragen.
+        """
+        width, height = self.levels[0]
+        pane_w, pane_h = self.compose_size
+        aspect = pane_w / pane_h
+        if stretch_images:
+            full = (width, height)
+        elif width / height > aspect:
+            full = (width, width / aspect)
+        else:
+            full = (height * aspect, height)
+        # Nicht über die Originalauflösung hinaus vergrößern
+        scale = min(1.0, max(zoom, pane_w / full[0]))
+        near = (full[0] * scale, full[1] * scale)
+        rng = random.Random(image_file)
+        overview = ((width - full[0]) / 2, (height - full[1]) / 2) + full
+        # Ragt der Detailausschnitt in einer Richtung über das Bild hinaus, bleibt er dort zentriert
+        detail = tuple(
+            rng.uniform(0, extent - length) if length <= extent else (extent - length) / 2
+            for extent, length in ((width, near[0]), (height, near[1]))
+        ) + near
+        return (detail, overview) if rng.random() < 0.5 else (overview, detail)
+
+    def _viewport(self, now):
+        phase = (now - self.started) / self.duration
+        t = phase - int(phase)
+        if int(phase) % 2:
+            # Bleibt das Bild länger stehen, schwenkt die Ansicht zurück
+            t = 1.0 - t
+        t = t * t * (3 - 2 * t)
+        start, end = self._path
+        return [a + (b - a) * t for a, b in zip(start, end)]
+
+    def _tile(self, level, col, row):
+        key = (self.directory, level, col, row)
+        tile = self.tile_cache.get(key)
+        if tile is None:
+            tile = pygame.image.load(os.path.join(self.directory, str(level), f"{col}_{row}.jpg")).convert()
+            self.tile_cache.put(key, tile)
+        return tile
+
+    def _compose(self, x, y, w, h):
+        pane_w, pane_h = self.compose_size
+        width, height = self.levels[0]
+        # Nur der Teil des Ausschnitts, der im Bild liegt, wird gezeichnet; der Rest bleibt schwarz
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        dest = pygame.Rect(
+            round((x0 - x) * pane_w / w), round((y0 - y) * pane_h / h),
+            max(1, round((x1 - x0) * pane_w / w)), max(1, round((y1 - y0) * pane_h / h))
+        ).clip(self._frame.get_rect())
+        if dest.size != self.compose_size:
+            self._frame.fill((0, 0, 0))
+        level = min(len(self.levels) - 1, max(0, round(math.log2(max(w / pane_w, 1e-6)))))
+        factor = 2 ** level
+        level_w, level_h = self.levels[level]
+        left, top = int(x0 / factor), int(y0 / factor)
+        right = max(left + 1, min(level_w, math.ceil(x1 / factor)))
+        bottom = max(top + 1, min(level_h, math.ceil(y1 / factor)))
+        region_size = (right - left, bottom - top)
+        if (self._scratch is None or self._scratch.get_width() < region_size[0]
+                or self._scratch.get_height() < region_size[1]):
+            self._scratch = pygame.Surface(region_size).convert()
+        region = self._scratch.subsurface((0, 0) + region_size)
+        size = self.tile
+        for row in range(top // size, (bottom - 1) // size + 1):
+            for col in range(left // size, (right - 1) // size + 1):
+                region.blit(self._tile(level, col, row), (col * size - left, row * size - top))
+        pygame.transform.smoothscale(region, dest.size, self._frame.subsurface(dest))
+
+    def advance(self, now):
+        """Rendert den Ausschnitt zum Zeitpunkt now; liefert die neue Fläche."""
+        self._compose(*self._viewport(now))
+        self.surface = pygame.transform.rotate(self._frame, self.rotation) if self.rotation else self._frame
+        base = self.next_due if self.next_due and now - self.next_due < 0.25 else now
+        self.next_due = base + self.interval
+        return self.surface
+
+    def close(self):
+        self.surface = None
+        self._scratch = None
+
+
+TRANSITIONS = ('none', 'crossfade', 'slide', 'wipe')
+
+
+class TransitionEngine:
+    """
+    Blendet beim Bildwechsel je Pane vom alten zum neuen Frame über
+    (crossfade, slide, wipe). Gearbeitet wird nur mit fertig skalierten
+    Flächen im Display-Pixelformat; die Überblendung nutzt die Flächen-Alpha
+    von SDL (set_alpha), ohne Per-Pixel-Alpha oder GPU.
+
+    Gezeichnet wird in die Subsurface der Pane; render() liefert die
+    betroffenen Bildschirmbereiche für display.update().
+
+    Die Renderzeit je Übergangsframe (inkl. Update) wird gemessen. Reicht das
+    Frame-Budget nicht, werden die Schritte ausgedünnt; bleiben weniger als
+    MIN_STEPS übrig, wird hart geschnitten.
+    """
+
+    MIN_STEPS = 3
+
+    def __init__(self, max_fps=60):
+        self.frame_interval = 1.0 / max_fps
+        self._active = {}
+        # Gemessene Kosten je (Art, Pane-Größe) in Sekunden pro Frame
+        self._cost = {}
+        self._drawn = []
+
+    def start(self, pane, kind, duration, old, new, target):
+        """Startet einen Übergang in `target`; False bedeutet harter Schnitt durch den Aufrufer."""
+        if kind not in TRANSITIONS[1:] or duration <= 0 or old.get_size() != new.get_size():
+            return False
+        interval = max(self.frame_interval, self._cost.get((kind, target.get_size()), 0.0) * 1.25)
+        if duration / interval < self.MIN_STEPS:
+            logging.debug(f"Übergang {kind} ({pane}) zu teuer, harter Schnitt")
+            return False
+        now = time.time()
+        self._active[pane] = {
+            'kind': kind, 'old': old, 'new': new, 'target': target,
+            'rect': pygame.Rect(target.get_abs_offset(), target.get_size()),
+            'start': now, 'duration': duration, 'interval': interval, 'next_due': now,
+        }
+        return True
+
+    def active(self, pane):
+        return pane in self._active
+
+    @property
+    def next_due(self):
+        return min((t['next_due'] for t in self._active.values()), default=None)
+
+    def render(self, now):
+        """Zeichnet alle fälligen Übergangsframes; liefert die geänderten Bildschirmbereiche."""
+        self._drawn = []
+        dirty = []
+        for pane, t in list(self._active.items()):
+            if now < t['next_due']:
+                continue
+            dirty.append(t['rect'])
+            progress = min(1.0, (now - t['start']) / t['duration'])
+            target = t['target']
+            width, height = target.get_size()
+            if progress >= 1.0:
+                target.blit(t['new'], (0, 0))
+                del self._active[pane]
+                continue
+            if t['kind'] == 'crossfade':
+                target.blit(t['old'], (0, 0))
+                t['new'].set_alpha(int(255 * progress))
+                target.blit(t['new'], (0, 0))
+                t['new'].set_alpha(None)
+            elif t['kind'] == 'slide':
+                # Die Subsurface beschneidet auf die Pane
+                shift = int(width * progress)
+                target.blit(t['old'], (-shift, 0))
+                target.blit(t['new'], (width - shift, 0))
+            else:
+                # Wipe: der alte Frame steht noch auf dem Schirm, nur der neue Streifen wird gezeichnet
+                target.blit(t['new'], (0, 0), pygame.Rect(0, 0, int(width * progress), height))
+            t['next_due'] = now + t['interval']
+            self._drawn.append((t['kind'], (width, height)))
+        return dirty
+
+    def measure(self, elapsed):
+        """Übernimmt die gemessene Zeit des letzten Übergangsframes und dünnt bei Bedarf aus."""
+        for key in self._drawn:
+            cost = self._cost.get(key)
+            self._cost[key] = elapsed if cost is None else cost * 0.7 + elapsed * 0.3
+        self._drawn = []
+        now = time.time()
+        for pane, t in self._active.items():
+            needed = self._cost.get((t['kind'], t['rect'].size), 0.0) * 1.25
+            if needed <= t['interval']:
+                continue
+            t['next_due'] += needed - t['interval']
+            t['interval'] = needed
+            remaining = t['start'] + t['duration'] - now
+            if remaining / needed < 1:
+                # Kein ganzer Schritt mehr im Budget: direkt zum Ziel-Frame
+                logging.debug(f"Übergang {t['kind']} ({pane}) überschreitet das Frame-Budget, harter Schnitt")
+                t['start'] = now - t['duration']
+                t['next_due'] = now
+            else:
+                logging.debug(f"Übergang {t['kind']} ({pane}) ausgedünnt auf {1 / needed:.0f} fps")
+
+    def clear(self):
+        self._active.clear()
+        self._drawn = []
+
+
+class StatusPublisher:
+    """
+    Hält den Anzeigestatus (aktuelle Datei je Pane, Index, Playlist-Größe,
+    Zeitstempel) im Speicher und stellt ihn über einen Unix-Socket bereit.
+
+    Der Status wird nur bei einer Änderung neu serialisiert; Leser (app.py)
+    verbinden sich und erhalten den letzten Stand als JSON.
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self._lock = threading.Lock()
+        self._status = {'split_screen': False, 'compat': '', 'updated': time.time(), 'panes': {}}
+        self._payload = json.dumps(self._status).encode('utf-8')
+        self._sock = None
+
+    def _changed(self):
+        self._status['updated'] = time.time()
+        self._payload = json.dumps(self._status).encode('utf-8')
+
+    def set_layout(self, split_screen, panes):
+        with self._lock:
+            stale = set(self._status['panes']) - set(panes)
+            if split_screen == self._status['split_screen'] and not stale:
+                return
+            self._status['split_screen'] = split_screen
+            for pane in stale:
+                del self._status['panes'][pane]
+            self._changed()
+
+    def publish_pane(self, pane, content, index, count):
+        kind, value = content
+        if kind == 'slideshow' and slidepack.parse_frame_key(value):
+            # Pack-Frames haben keine Bilddatei; die Vorschau zeigt den Platzhalter
+            file, url = value, "/static/infoscreen.jpg"
+        elif kind == 'slideshow':
+            file, url = value, to_relative_cache_path(value)
+        else:
+            file = url = "/static/infoscreen.jpg"
+        with self._lock:
+            current = self._status['panes'].get(pane)
+            state = {'mode': kind, 'file': file, 'url': url, 'index': index, 'count': count}
+            if current is not None and all(current.get(k) == v for k, v in state.items()):
+                return
+            if current is None or current.get('file') != file:
+                state['since'] = time.time()
+                if kind == 'slideshow' or pane == 'fullscreen':
+                    self._status['compat'] = file
+            else:
+                state['since'] = current.get('since')
+            self._status['panes'][pane] = state
+            self._changed()
+
+    def set(self, key, value):
+        """Setzt einen zusätzlichen Top-Level-Eintrag im Status."""
+        with self._lock:
+            if self._status.get(key) == value:
+                return
+            self._status[key] = value
+            self._changed()
+
+    def start(self):
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.socket_path)
+            sock.listen(8)
+        except Exception:
+            logging.exception(f"Status-Socket {self.socket_path} konnte nicht geöffnet werden")
+            return
+        self._sock = sock
+        threading.Thread(target=self._serve, name="status", daemon=True).start()
+        logging.info(f"Status-Socket bereit: {self.socket_path}")
+
+    def _serve(self):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            with conn:
+                with self._lock:
+                    payload = self._payload
+                try:
+                    conn.sendall(payload)
+                except OSError:
+                    pass
+
+    def stop(self):
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            sock.close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+
+class LookaheadDecoder:
+    """
+    Dekodiert die nächsten N Bilder je Pane in einem Hintergrund-Thread vor.
+
+    Die fertigen Puffer (RGB, bereits in Pane-Größe) werden vom Render-Loop
+    per take() abgeholt, sodass ein Bildwechsel nur noch ein Blit ist.
+    Die Summe der vorgehaltenen Puffer bleibt unter max_bytes.
+    """
+
+    def __init__(self, count, max_bytes):
+        self.count = count
+        self.max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._wanted = []
+        self._ready = {}
+        self._failed = set()
+        self._busy = None
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="lookahead", daemon=True)
+        self._thread.start()
+
+    def configure(self, count, max_bytes):
+        with self._cond:
+            self.count = count
+            self.max_bytes = max_bytes
+            self._cond.notify_all()
+
+    def request(self, keys):
+        """Setzt die vorzudekodierenden Keys (Reihenfolge = Priorität)."""
+        with self._cond:
+            self._wanted = list(keys)
+            wanted = set(self._wanted)
+            for key in list(self._ready):
+                if key not in wanted:
+                    del self._ready[key]
+            self._failed &= wanted
+            self._cond.notify_all()
+
+    def take(self, key, timeout=5.0):
+        """
+        Liefert (size, bytes) für key oder None. Wird key gerade dekodiert,
+        wird auf das Ergebnis gewartet statt doppelt zu dekodieren.
+        """
+        with self._cond:
+            deadline = time.time() + timeout
+            while self._busy == key and time.time() < deadline:
+                self._cond.wait(deadline - time.time())
+            data = self._ready.pop(key, None)
+            self._cond.notify_all()
+            return data
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _used_bytes(self):
+        return sum(len(data) for _, data in self._ready.values())
+
+    def _next_job(self):
+        used = self._used_bytes()
+        for key in self._wanted:
+            if key in self._ready or key in self._failed:
+                continue
+            width, height = key[1]
+            if used + width * height * 3 > self.max_bytes:
+                return None
+            return key
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                key = self._next_job()
+                while key is None and not self._stopped:
+                    self._cond.wait()
+                    key = self._next_job()
+                if self._stopped:
+                    return
+                self._busy = key
+            try:
+                img = decode_pane_image(*key)
+                data = (img.size, img.tobytes())
+            except DecodeBudgetError as e:
+                logging.error(f"Vorausdekodierung übersprungen: {e}")
+                data = None
+            except Exception:
+                logging.exception(f"Vorausdekodierung fehlgeschlagen: {key[0]}")
+                data = None
+            with self._cond:
+                self._busy = None
+                if key in self._wanted:
+                    if data is None:
+                        self._failed.add(key)
+                    else:
+                        self._ready[key] = data
+                        logging.debug(f"Vorausdekodiert: {key[0]}")
+                self._cond.notify_all()
+
+
+def lookahead_keys(pane_states, specs, count, switch_due):
+    """
+    Ermittelt die Keys der nächsten `count` Bilder je Pane. Da jede Pane
+    ihren eigenen Takt hat, werden sie nach dem Zeitpunkt sortiert, zu dem
+    sie gebraucht werden.
+    """
+    queued = []
+    for pane, spec in specs.items():
+        pane_mode, playlist = pane_states[pane]
+        if pane_mode != 'slideshow' or len(playlist) < 2:
+            continue
+        upcoming = playlist.upcoming(count, switch_due[pane], spec.duration)
+        for step, path in enumerate(upcoming):
+            if path == playlist.current or slidepack.parse_frame_key(path):
+                continue
+            if derivative_store.has_pyramid(path):
+                # Poster werden aus Kacheln gerendert, nicht als Ganzes dekodiert
+                continue
+            key = (path, spec.rect.size, spec.rotation, spec.stretch_images)
+            queued.append((switch_due[pane] + step * spec.duration, key))
+    return [key for _, key in sorted(queued, key=lambda entry: entry[0])]
+
+
+class FrameScheduler:
+    """
+    Bestimmt, wie lange der Render-Loop schlafen darf: bis zur nächsten
+    echten Deadline (Bildwechsel, Config-Prüfung, Sync, Animationsframe).
+    Zwischen den Deadlines wartet der Loop blockierend auf Eingabe-Events,
+    statt mit fester Bildrate zu laufen.
+    """
+
+    def __init__(self, max_fps=60):
+        self.frame_interval = 1.0 / max_fps
+        self._deadlines = {}
+
+    def at(self, name, when):
+        """Setzt (oder entfernt mit None) die Deadline `name`."""
+        if when is None:
+            self._deadlines.pop(name, None)
+        else:
+            self._deadlines[name] = when
+
+    def animate(self, name, next_frame):
+        """Plant den nächsten Animationsframe, höchstens mit max_fps."""
+        if next_frame is None:
+            self.at(name, None)
+        else:
+            self.at(name, max(next_frame, time.time() + self.frame_interval))
+
+    def wait(self):
+        """Schläft bis zur nächsten Deadline oder einem Event; liefert die anstehenden Events."""
+        timeout = min(self._deadlines.values(), default=time.time() + 1.0) - time.time()
+        if timeout > 0:
+            event = pygame.event.wait(max(1, math.ceil(timeout * 1000)))
+        else:
+            event = pygame.event.poll()
+        events = [] if event.type == pygame.NOEVENT else [event]
+        return events + pygame.event.get()
+
+
+def main():
+    setup_logging()
+    logging.info("Starte Slideshow-Programm")
+    try:
+        pygame.init()
+        pygame.mouse.set_visible(False)
+    except Exception:
+        logging.exception("Fehler beim Initialisieren von Pygame")
+        sys.exit(1)
+
+    try:
+        infoObject = pygame.display.Info()
+        screen = pygame.display.set_mode(
+            (infoObject.current_w, infoObject.current_h),
+            pygame.FULLSCREEN | pygame.NOFRAME
+        )
+        pygame.display.set_caption('Slideshow')
+    except Exception:
+        logging.exception("Fehler beim Einrichten des Pygame-Fensters")
+        sys.exit(1)
+
+    scheduler = FrameScheduler()
+    smb_pool.start_keepalive()
+    status = StatusPublisher(STATUS_SOCKET)
+    status.start()
+    screen_size = (infoObject.current_w, infoObject.current_h)
+
+    # Config laden und Log-Level setzen
+    config_watcher = ConfigWatcher(CONFIG_FILE)
+    config = load_config()
+    apply_log_level(config)
+
+    # Zustand je Pane: Playlist und eigener Wechsel-Timer
+    specs = pane_specs(config, screen_size)
+    playlists = {}
+    last_switch = {}
+    # Quellen werden im Hintergrund abgeglichen; die Generation verwirft Ergebnisse überholter Quellen
+    syncer = SourceSyncer()
+    generations = {}
+    # Nächster Abgleich je Pane: Sync-Intervall, nach Fehlern das Backoff der Quelle
+    next_sync = {}
+    apply_sync_policy(config)
+    image_index.start_probe()
+    for pane, spec in specs.items():
+        # Bekannte Quellen kommen direkt aus dem Bildindex, abgeglichen wird kurz nach dem Start
+        playlists[pane] = Playlist(pane)
+        generations[pane] = 0
+        syncer.request(pane, spec, 0, cached=True)
+        last_switch[pane] = time.time()
+        next_sync[pane] = time.time() + sync_delay(INDEX_RESYNC_DELAY)
 
-    index = 0
-    left_index = 0
-    right_index = 0
-    last_switch = time.time()
     config_check_interval = 1.0
     last_config_check = time.time()
+    info_text = get_device_info()
+    # Komponierte Frames je Pane: {pane: {'key': ..., 'surface': ...}}
+    pane_frames = {}
+    # Dauerhafte Subsurfaces des Bildschirms je Pane, neu angelegt nur bei Layout-Wechsel
+    targets = {}
+    current_layout = None
+    # Laufende GIF-Animationen und Poster-Schwenks je Pane
+    animations = {}
+    tile_cache = FrameCache(TILE_CACHE_BYTES)
+    # Übergänge beim Bildwechsel, gleiche Bildrate wie der Scheduler
+    transitions = TransitionEngine()
+    lookahead = LookaheadDecoder(
+        max(0, int(config.get('lookahead_count', 2))),
+        int(config.get('lookahead_max_mb', 64)) * 1024 * 1024
+    )
+    lookahead_wanted = None
+    frame_cache = FrameCache(int(config.get('frame_cache_mb', 48)) * 1024 * 1024)
+    decode_limits['max_bytes'] = int(config.get('decode_max_mb', 128)) * 1024 * 1024
+    derivative_store.workers = int(config.get('ingest_workers', 0))
+    derivative_store.poster_min_side = int(config.get('poster_min_side', 0))
+    derivative_store.poster_max_bytes = int(config.get('poster_max_mb', 256)) * 1024 * 1024
+    ingest_needed = True
+    image_cache.max_bytes = int(config.get('cache_max_mb', 1024)) * 1024 * 1024
+    derivative_store.max_bytes = int(config.get('derivative_max_mb', 1024)) * 1024 * 1024
+    needs_flip = True
     running = True
 
     while running:
-        for event in pygame.event.get():
+        for event in scheduler.wait():
             if event.type == pygame.QUIT:
                 logging.info("Beenden des Slideshow-Skripts.")
                 running = False
             elif event.type == pygame.KEYDOWN and event.key in [pygame.K_ESCAPE, pygame.K_q]:
                 logging.info("Beenden des Slideshow-Skripts durch Benutzer.")
                 running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                needs_flip = True
+
+        # Fertige Abgleiche übernehmen; bis dahin bleibt der letzte gute Stand stehen
+        snapshots = syncer.collect()
+        if snapshots:
+            # Auch ein verworfener Abgleich einer entfernten Quelle kann noch gepinnt haben
+            image_cache.retain_pins({spec.source[0] for spec in specs.values()})
+        for snapshot in snapshots:
+            pane = snapshot.pane
+            if pane not in specs or generations[pane] != snapshot.generation:
+                continue
+            if not snapshot.ok:
+                next_sync[pane] = syncer.retry_at(pane) or time.time() + SYNC_BACKOFF_BASE
+            status.set('sources', syncer.health(specs))
+            playlist = playlists[pane]
+            if not snapshot.ok and not snapshot.images and len(playlist):
+                # Nichts im Cache: die zuletzt gespielte Liste läuft weiter
+                continue
+            was_empty = playlist.current is None
+            playlist.update(snapshot.images, specs[pane].playlist, snapshot.details)
+            if was_empty:
+                last_switch[pane] = time.time()
+            logging.info(f"Fetch {pane}: {len(playlist)} Bilder{'' if snapshot.ok else ' (offline, aus dem Cache)'}")
+            ingest_needed = True
 
-        # Config reload?
+        # Config nur bei tatsächlicher Dateiänderung neu einlesen und als Diff anwenden
         if time.time() - last_config_check >= config_check_interval:
-            current_config = load_config()
             last_config_check = time.time()
-            new_stretch = current_config.get("stretch_images", True)
-            new_mode = current_config.get('mode', 'info')
-            new_mode_left = current_config.get('mode_left', 'slideshow')
-            new_mode_right = current_config.get('mode_right', 'slideshow')
-            new_split = current_config.get('split_screen', False)
-            new_duration = current_config.get('display_duration', 5)
-            new_rotation = current_config.get('rotation', 0)
-            new_reload = current_config.get('reload', False)
-            new_path = current_config.get('image_path', '')
-            new_left = current_config.get('image_path_left', '')
-            new_right = current_config.get('image_path_right', '')
-
-            changed = (
-                new_mode != mode or
-                new_mode_left != mode_left or
-                new_mode_right != mode_right or
-                new_split != split_screen or
-                new_duration != display_duration or
-                new_rotation != rotation or
-                new_reload or
-                new_path != image_path or
-                new_left != left_path or
-                new_right != right_path or
-                new_stretch != stretch_images
-            )
-            if changed:
-                logging.info("Änderungen in config.json erkannt – lade neu.")
-                mode, mode_left, mode_right = new_mode, new_mode_left, new_mode_right
-                split_screen = new_split
-                display_duration = new_duration
-                rotation = new_rotation
-                stretch_images = new_stretch
-                image_path, left_path, right_path = new_path, new_left, new_right
-
-                image_files, left_images, right_images = fetch_images_from_config(current_config)
-
-                if split_screen:
-                    if not left_images:
-                        mode_left = "info"
-                    if not right_images:
-                        mode_right = "info"
+            if config_watcher.changed():
+                new_config = load_config()
+                diff = diff_config(config, new_config, screen_size)
+                if diff.changed:
+                    logging.info(f"Änderungen in config.json erkannt: {', '.join(sorted(diff.changed))}")
+                config = new_config
+                specs = pane_specs(config, screen_size)
+
+                if 'log_level' in diff.changed:
+                    apply_log_level(config)
+                for pane in set(playlists) - set(specs):
+                    # Pane ist aus dem Layout entfallen
+                    del playlists[pane], last_switch[pane], generations[pane], next_sync[pane]
+                image_cache.retain_pins({spec.source[0] for spec in specs.values()})
+                if diff.reload:
+                    refetch = set(specs)
                 else:
-                    if not image_files:
-                        mode = "info"
+                    refetch = diff.reindex
+                    # Pane wechselt in den Slideshow-Modus, hat aber noch keine Bilder
+                    refetch |= {
+                        pane for pane in diff.modes
+                        if specs[pane].mode == 'slideshow' and not playlists.get(pane)
+                    }
+                for pane in refetch:
+                    # Ein explizites Reload listet neu, sonst genügt der Index
+                    if pane not in playlists:
+                        playlists[pane] = Playlist(pane)
+                        last_switch[pane] = time.time()
+                    generations[pane] = generations.get(pane, 0) + 1
+                    next_sync[pane] = time.time() + sync_delay(config.get('smb_sync_interval', 300))
+                    syncer.request(
+                        pane, specs[pane], generations[pane], cached=not diff.reload, force=diff.reload,
+                        priority=playlists[pane].upcoming(INGEST_AHEAD)
+                    )
+                for pane in diff.playlist - refetch:
+                    # Nur Reihenfolge, Gewichte oder Zeitfenster geändert: ohne neues Listing umsortieren
+                    playlists[pane].update(
+                        playlists[pane].images, specs[pane].playlist, image_index.details(specs[pane].source[0])
+                    )
+                if refetch or diff.display or diff.layout or diff.playlist:
+                    ingest_needed = True
 
-                index = left_index = right_index = 0
-                last_switch = time.time()
+                if diff.reload:
+                    config['reload'] = False
+                    save_config(config)
 
-                if new_reload:
-                    current_config['reload'] = False
-                    save_config(current_config)
+                image_cache.max_bytes = int(config.get('cache_max_mb', 1024)) * 1024 * 1024
+                derivative_store.max_bytes = int(config.get('derivative_max_mb', 1024)) * 1024 * 1024
+                apply_sync_policy(config)
+                derivative_store.poster_min_side = int(config.get('poster_min_side', 0))
+                derivative_store.poster_max_bytes = int(config.get('poster_max_mb', 256)) * 1024 * 1024
+                decode_limits['max_bytes'] = int(config.get('decode_max_mb', 128)) * 1024 * 1024
+                frame_cache.resize(int(config.get('frame_cache_mb', 48)) * 1024 * 1024)
+                lookahead.configure(
+                    max(0, int(config.get('lookahead_count', 2))),
+                    int(config.get('lookahead_max_mb', 64)) * 1024 * 1024
+                )
 
-                config = current_config
+            # Info-Screen nur neu zeichnen, wenn sich der Inhalt ändert
+            if any(spec.mode == 'info' or playlists[pane].current is None for pane, spec in specs.items()):
+                info_text = get_device_info()
 
-        screen.fill((0, 0, 0))
+        transition = config.get('transition', 'none')
+        transition_duration = float(config.get('transition_duration', 0.8))
 
-        if split_screen:
-            left_w = infoObject.current_w // 2
-            right_w = infoObject.current_w - left_w
-            left_surf = pygame.Surface((left_w, infoObject.current_h))
-            right_surf = pygame.Surface((right_w, infoObject.current_h))
+        # Quellen auf eigenem Intervall inkrementell abgleichen, unabhängig vom Bildwechsel
+        sync_panes = [pane for pane, spec in specs.items() if spec.source[0]]
+        for pane in sync_panes:
+            if time.time() >= next_sync[pane]:
+                next_sync[pane] = time.time() + sync_delay(config.get('smb_sync_interval', 300))
+                if not syncer.busy(pane):
+                    # Die Playlist behält beim Übernehmen das aktuelle Bild
+                    syncer.request(pane, specs[pane], generations[pane], priority=playlists[pane].upcoming(INGEST_AHEAD))
 
-            if time.time() - last_switch > display_duration:
-                if left_path.startswith('smb://'):
-                    left_images = prefetch_smb_images(
-                        left_path,
-                        config.get('smb_username_left',''),
-                        config.get('smb_password_left',''),
-                        config.get('smb_domain_left','')
-                    )
-                if right_path.startswith('smb://'):
-                    right_images = prefetch_smb_images(
-                        right_path,
-                        config.get('smb_username_right',''),
-                        config.get('smb_password_right',''),
-                        config.get('smb_domain_right','')
-                    )
-                if mode_left == "slideshow" and left_images:
-                    left_index = (left_index + 1) % len(left_images)
-                elif mode_left == "slideshow":
-                    mode_left = "info"
-                if mode_right == "slideshow" and right_images:
-                    right_index = (right_index + 1) % len(right_images)
-                elif mode_right == "slideshow":
-                    mode_right = "info"
-                last_switch = time.time()
-
-            # Linke Seite
-            if mode_left == "slideshow" and left_images:
-                left_file = left_images[left_index]
-                try:
-                    surf = pygame.image.load(left_file)
-                    if rotation:
-                        pil = Image.open(left_file)
-                        rot = pil.rotate(rotation, expand=True)
-                        p = os.path.join(os.path.dirname(left_file), f"rotated_left_{os.path.basename(left_file)}")
-                        rot.save(p)
-                        surf = pygame.image.load(p)
-                    w_img, h_img = surf.get_size()
-                    if stretch_images:
-                        surf = pygame.transform.scale(surf, (left_w, infoObject.current_h))
-                        left_surf.blit(surf, (0, 0))
-                    else:
-                        scale = min(left_w / w_img, infoObject.current_h / h_img)
-                        nw, nh = int(w_img * scale), int(h_img * scale)
-                        if (nw, nh) != (w_img, h_img):
-                            surf = pygame.transform.scale(surf, (nw, nh))
-                        xo = (left_w - nw) // 2
-                        yo = (infoObject.current_h - nh) // 2
-                        left_surf.blit(surf, (xo, yo))
-                    with open("current_image.txt", "w") as f:
-                        f.write(left_file)
-                    rel = to_relative_cache_path(left_file)
-                    with open(CURRENT_IMAGE_LEFT, "w") as f:
-                        f.write(rel)
-                except Exception:
-                    logging.exception(f"Fehler beim Anzeigen des linken Bildes {left_file}")
-                    display_message(left_surf, "Fehler beim Laden (links).", left_surf)
-            elif mode_left == "info":
-                font = pygame.font.SysFont(None, 36)
-                info_text = get_device_info()
-                y0 = 20
-                for line in info_text.split('\n'):
-                    text = font.render(line, True, (255, 255, 255))
-                    left_surf.blit(text, (20, y0))
-                    y0 += 40
-                with open(CURRENT_IMAGE_LEFT, "w") as f:
-                    f.write("/static/infoscreen.jpg")
-            else:
-                display_message(left_surf, "Keine Bilder (links).", left_surf)
-                with open(CURRENT_IMAGE_LEFT, "w") as f:
-                    f.write("/static/infoscreen.jpg")
+        # Jede Pane wechselt nach ihrer eigenen Anzeigedauer; Änderungen wirken sofort
+        for pane, spec in specs.items():
+            if time.time() - last_switch[pane] >= spec.duration:
+                playlists[pane].advance(time.time())
+                last_switch[pane] = time.time()
+                ingest_needed = True
 
-            # Rechte Seite
-            if mode_right == "slideshow" and right_images:
-                right_file = right_images[right_index]
-                try:
-                    surf = pygame.image.load(right_file)
-                    if rotation:
-                        pil = Image.open(right_file)
-                        rot = pil.rotate(rotation, expand=True)
-                        p = os.path.join(os.path.dirname(right_file), f"rotated_right_{os.path.basename(right_file)}")
-                        rot.save(p)
-                        surf = pygame.image.load(p)
-                    w_img, h_img = surf.get_size()
-                    if stretch_images:
-                        surf = pygame.transform.scale(surf, (right_w, infoObject.current_h))
-                        right_surf.blit(surf, (0, 0))
-                    else:
-                        scale = min(right_w / w_img, infoObject.current_h / h_img)
-                        nw, nh = int(w_img * scale), int(h_img * scale)
-                        if (nw, nh) != (w_img, h_img):
-                            surf = pygame.transform.scale(surf, (nw, nh))
-                        xo = (right_w - nw) // 2
-                        yo = (infoObject.current_h - nh) // 2
-                        right_surf.blit(surf, (xo, yo))
-                    with open("current_image.txt", "w") as f:
-                        f.write(right_file)
-                    rel = to_relative_cache_path(right_file)
-                    with open(CURRENT_IMAGE_RIGHT, "w") as f:
-                        f.write(rel)
-                except Exception:
-                    logging.exception(f"Fehler beim Anzeigen des rechten Bildes {right_file}")
-                    display_message(right_surf, "Fehler beim Laden (rechts).", right_surf)
-            elif mode_right == "info":
-                font = pygame.font.SysFont(None, 36)
-                info_text = get_device_info()
-                y0 = 20
-                for line in info_text.split('\n'):
-                    text = font.render(line, True, (255, 255, 255))
-                    right_surf.blit(text, (20, y0))
-                    y0 += 40
-                with open(CURRENT_IMAGE_RIGHT, "w") as f:
-                    f.write("/static/infoscreen.jpg")
-            else:
-                display_message(right_surf, "Keine Bilder (rechts).", right_surf)
-                with open(CURRENT_IMAGE_RIGHT, "w") as f:
-                    f.write("/static/infoscreen.jpg")
+        pane_states = {}
+        for pane, spec in specs.items():
+            pane_mode = spec.mode
+            if pane_mode == 'slideshow' and playlists[pane].current is None:
+                # Keine Bilder oder keines im aktuellen Zeitfenster
+                pane_mode = 'info'
+            pane_states[pane] = (pane_mode, playlists[pane])
 
-            screen.blit(left_surf, (0, 0))
-            screen.blit(right_surf, (left_w, 0))
+        if ingest_needed:
+            derivative_store.ingest(ingest_jobs(pane_states, specs))
+            ingest_needed = False
 
-        else:
-            # Vollbild
-            if mode == 'slideshow' and image_files:
-                if time.time() - last_switch > display_duration:
-                    if image_path.startswith('smb://'):
-                        image_files = prefetch_smb_images(
-                            image_path,
-                            config.get('smb_username',''),
-                            config.get('smb_password',''),
-                            config.get('smb_domain','')
-                        )
-                    if image_files:
-                        index = (index + 1) % len(image_files)
-                    else:
-                        mode = 'info'
-                    last_switch = time.time()
+        layout = [(pane, tuple(spec.rect)) for pane, spec in specs.items()]
+        if layout != current_layout:
+            # Layout-Wechsel: Subsurfaces neu anlegen und alle Panes neu aufbauen
+            current_layout = layout
+            targets = {pane: screen.subsurface(spec.rect) for pane, spec in specs.items()}
+            pane_frames.clear()
+            for anim in animations.values():
+                anim.close()
+            animations.clear()
+            transitions.clear()
+            screen.fill((0, 0, 0))
+            needs_flip = True
 
-                if mode == 'slideshow' and image_files:
-                    image_file = image_files[index]
-                try:
-                    surf = pygame.image.load(image_file)
-                    if rotation:
-                        pil = Image.open(image_file)
-                        rot = pil.rotate(rotation, expand=True)
-                        p = os.path.join(os.path.dirname(image_file), f"rotated_{os.path.basename(image_file)}")
-                        rot.save(p)
-                        surf = pygame.image.load(p)
-                    sw, sh = infoObject.current_w, infoObject.current_h
-                    w_img, h_img = surf.get_size()
-                    if stretch_images:
-                        surf = pygame.transform.scale(surf, (sw, sh))
-                        screen.blit(surf, (0, 0))
-                    else:
-                        scale = min(sw / w_img, sh / h_img)
-                        nw, nh = int(w_img * scale), int(h_img * scale)
-                        if (nw, nh) != (w_img, h_img):
-                            surf = pygame.transform.scale(surf, (nw, nh))
-                        xo = (sw - nw) // 2
-                        yo = (sh - nh) // 2
-                        screen.blit(surf, (xo, yo))
-                    with open("current_image.txt", "w") as f:
-                        f.write(image_file)
-                    rel = to_relative_cache_path(image_file)
-                    with open(CURRENT_IMAGE_FULLSCREEN, "w") as f:
-                        f.write(rel)
-                except Exception:
-                    logging.exception(f"Fehler beim Anzeigen des Bildes {image_file}")
-                    display_message(screen, "Fehler beim Laden der Bilder.", infoObject)
-            elif mode == 'info':
-                device_info = get_device_info()
-                font = pygame.font.SysFont(None, 36)
-                y0 = 50
-                for line in device_info.split('\n'):
-                    text = font.render(line, True, (255, 255, 255))
-                    rect = text.get_rect(center=(infoObject.current_w // 2, y0))
-                    screen.blit(text, rect)
-                    y0 += 40
-                with open("current_image.txt", "w") as f:
-                    f.write("/static/infoscreen.jpg")
-                with open(CURRENT_IMAGE_FULLSCREEN, "w") as f:
-                    f.write("/static/infoscreen.jpg")
-                pygame.display.flip()
-                clock.tick(30)
+        # Dirty-Tracking: eine Pane wird nur neu komponiert, wenn sich ihr Inhalt ändert
+        dirty = []
+        status.set_layout(len(specs) > 1, specs)
+        for pane, spec in specs.items():
+            target = targets[pane]
+            size = spec.rect.size
+            pane_mode, playlist = pane_states[pane]
+            if pane_mode == 'slideshow':
+                content = ('slideshow', playlist.current)
+            elif pane_mode == 'info':
+                content = ('info', info_text)
+            else:
+                content = ('message', pane_messages(pane)[0])
+            status.publish_pane(pane, content, playlist.position, len(playlist))
+            key = (content, size, spec.rotation, spec.stretch_images)
+            cached = pane_frames.get(pane)
+            if cached is not None and cached['key'] == key:
+                anim = animations.get(pane)
+                if anim is not None and not transitions.active(pane) and time.time() >= anim.next_due:
+                    target.blit(anim.advance(time.time()), (0, 0))
+                    dirty.append(spec.rect)
                 continue
+            if pane in animations:
+                animations.pop(pane).close()
+            anim = None
+            if content[0] == 'slideshow':
+                # Skalierte Frames einer Schleife belegen höchstens die Hälfte des Frame-Caches
+                anim = GifAnimation.open(
+                    content[1], size, spec.rotation, spec.stretch_images, frame_cache.max_bytes // 2
+                )
+                if anim is None:
+                    anim = PosterView.open(
+                        content[1], size, spec.rotation, spec.stretch_images, spec.duration,
+                        float(config.get('poster_fps', 10)), float(config.get('poster_zoom', 0.5)), tile_cache
+                    )
+            if anim is not None:
+                animations[pane] = anim
+                frame = anim.surface
             else:
-                display_message(screen, "Keine Bilder gefunden.", infoObject)
-                with open("current_image.txt", "w") as f:
-                    f.write("/static/infoscreen.jpg")
-                with open(CURRENT_IMAGE_FULLSCREEN, "w") as f:
-                    f.write("/static/infoscreen.jpg")
+                frame = build_pane_frame(
+                    pane, content, size, spec.rotation, spec.stretch_images, lookahead, frame_cache
+                )
+            # Nur Bild-zu-Bild-Wechsel werden überblendet, Info- und Meldungs-Panes schneiden hart
+            fade = cached is not None and cached['key'][0][0] == 'slideshow' and content[0] == 'slideshow'
+            if not (fade and transitions.start(pane, transition, transition_duration, target.copy(), frame, target)):
+                target.blit(frame, (0, 0))
+                dirty.append(spec.rect)
+            pane_frames[pane] = {'key': key, 'surface': frame}
+            if content[0] == 'slideshow':
+                image_cache.touch(content[1])
+                status.set('frame_cache', frame_cache.stats())
+
+        switch_due = {pane: last_switch[pane] + spec.duration for pane, spec in specs.items()}
+        wanted = lookahead_keys(pane_states, specs, lookahead.count, switch_due)
+        if wanted != lookahead_wanted:
+            # Bereits komponierte Frames müssen nicht erneut dekodiert werden
+            lookahead.request([key for key in wanted if not frame_cache.contains(*key)])
+            lookahead_wanted = wanted
+
+        render_start = time.perf_counter()
+        transition_rects = transitions.render(time.time())
+        if needs_flip:
+            pygame.display.flip()
+            needs_flip = False
+        elif dirty or transition_rects:
+            # Nur die geänderten Panes auf den Bildschirm bringen
+            pygame.display.update(dirty + transition_rects)
+        if transition_rects:
+            transitions.measure(time.perf_counter() - render_start)
+
+        # Nächste Deadlines; dazwischen schläft der Loop in scheduler.wait()
+        scheduler.at('switch', min(switch_due.values(), default=None))
+        scheduler.animate('gif', min((anim.next_due for anim in animations.values()), default=None))
+        scheduler.animate('transition', transitions.next_due)
+        scheduler.at('config', last_config_check + config_check_interval)
+        scheduler.at('sync', min((next_sync[pane] for pane in sync_panes), default=None))
 
-        pygame.display.flip()
-        clock.tick(30)
+    for anim in animations.values():
+        anim.close()
+    lookahead.stop()
+    status.stop()
+    smb_pool.close_all()
+    image_cache.save()
+    image_index.close()
+    slide_packs.close()
+    derivative_store.shutdown()
 
 
 if __name__ == '__main__':
+    setup_logging()
     if not os.path.exists(CONFIG_FILE):
         default_config = {
             "mode": "info",
@@ -623,6 +3284,28 @@ if __name__ == '__main__':
             "smb_password_right": "",
             "reload": False,
             "stretch_images": True,
+            "transition": "none",
+            "transition_duration": 0.8,
+            "lookahead_count": 2,
+            "lookahead_max_mb": 64,
+            "smb_sync_interval": 300,
+            "recursive": False,
+            "order": "name",
+            "smb_concurrency": 3,
+            "smb_concurrency_left": 3,
+            "smb_concurrency_right": 3,
+            "cache_max_mb": 1024,
+            "ingest_workers": 0,
+            "derivative_max_mb": 1024,
+            "decode_max_mb": 128,
+            "frame_cache_mb": 48,
+            "smb_bandwidth_mbit": 0,
+            "smb_full_sync_windows": [],
+            "smb_sync_jitter": 30,
+            "poster_min_side": 0,
+            "poster_max_mb": 256,
+            "poster_zoom": 0.5,
+            "poster_fps": 10,
             "log_level": "DEBUG"
         }
         try:
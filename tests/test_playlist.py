@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import slideshow  # noqa: E402
+
+
+class PatternTest(unittest.TestCase):
+    """Gewichte und Zeitfenster gelten für den Pfad in der Quelle, nicht für die Cache-Datei."""
+
+    OPTIONS = {'weights': {'angebot_*.jpg': 3, 'alt/*': 0}, 'time_windows': {'abend/*': ['17:00', '17:01']}}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = slideshow.ImageIndex(os.path.join(self.tmp.name, 'index.db'))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def playlist(self, source, listing):
+        self.index.sync(source, True, listing)
+        playlist = slideshow.Playlist('test')
+        playlist.update([entry[2] for entry in listing.values()], self.OPTIONS, self.index.details(source))
+        return playlist
+
+    def check(self, playlist, local):
+        self.assertEqual(playlist.weight(local('angebot_1.jpg')), 3)
+        self.assertEqual(playlist.weight(local('alt/foo.jpg')), 0)
+        self.assertEqual(playlist.weight(local('neu.jpg')), 1)
+        self.assertFalse(playlist.allowed(local('abend/bar.jpg'), 0))
+        self.assertTrue(playlist.allowed(local('neu.jpg'), 0))
+
+    def test_local_source(self):
+        root = os.path.join(self.tmp.name, 'bilder')
+        names = ['angebot_1.jpg', 'alt/foo.jpg', 'abend/bar.jpg', 'neu.jpg']
+        playlist = self.playlist(root, {name: (1, 1.0, os.path.join(root, name)) for name in names})
+        self.check(playlist, lambda name: os.path.join(root, name))
+
+    def test_smb_source(self):
+        source = 'smb://srv/share/bilder'
+
+        def local(name):
+            return slideshow.image_cache.path_for('smb://srv/share', f"bilder/{name}")
+
+        names = ['angebot_1.jpg', 'alt/foo.jpg', 'abend/bar.jpg', 'neu.jpg']
+        playlist = self.playlist(source, {name: (1, 1.0, local(name)) for name in names})
+        self.assertNotEqual(os.path.basename(local('angebot_1.jpg')), 'angebot_1.jpg')
+        self.check(playlist, local)
+
+
+if __name__ == '__main__':
+    unittest.main()